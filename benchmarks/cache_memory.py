@@ -0,0 +1,59 @@
+"""
+Memory used by the cache to store `--records` records of `--fields` fields, measured with tracemalloc.
+No server needed, the cache is filled directly:
+
+    $ python benchmarks/cache_memory.py --records 100000 --fields 20
+"""
+import argparse
+import time
+import tracemalloc
+from otools_rpc.external_api import Environment
+from otools_rpc.external_api.cache import CacheModel
+
+
+def make_fields(count: int) -> dict:
+    fields = {'id': {'type': 'integer', 'store': True}}
+    for i in range(count):
+        fields[f"field_{i}"] = {'type': ['char', 'integer', 'float', 'boolean'][i % 4], 'store': True}
+    return fields
+
+
+def make_values(res_id: int, fields: dict) -> dict:
+    samples = {'char': f"value {res_id}", 'integer': res_id, 'float': res_id * 1.5, 'boolean': bool(res_id % 2)}
+    return {name: samples[infos['type']] for name, infos in fields.items() if name != 'id'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--fields', type=int, default=20)
+    args = parser.parse_args()
+
+    env = Environment('http://localhost:8069', 'admin', 'admin', db='bench', auto_auth=False, log_level='WARNING', cache_no_expiration=True)
+    env.user = {'id': 2}        # Offline: nothing is sent to the server
+    fields = make_fields(args.fields)
+    rows = [{'id': res_id, **make_values(res_id, fields)} for res_id in range(1, args.records + 1)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    model_cache = env.cache['res.partner'] = CacheModel(env.cache, 'res.partner', fields=fields)
+    model_cache.update('read', None, rows)
+    fill_time = time.perf_counter() - start
+    memory, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for res_id in range(1, args.records + 1):
+        model_cache[res_id]['field_0'].get()
+    get_time = time.perf_counter() - start
+
+    values = args.records * args.fields
+    print(f"{args.records} records x {args.fields} fields ({values} values)")
+    print(f"cache memory:   {memory / 1024 ** 2:.1f} MB ({memory / values:.0f} bytes per value, values excluded)")
+    print(f"peak memory:    {peak / 1024 ** 2:.1f} MB")
+    print(f"fill time:      {fill_time * 1000:.0f} ms")
+    print(f"get time:       {get_time / args.records * 1e6:.2f} us per field")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+"""
+Local stand-in for an Odoo server, so benchmarks run offline and are reproducible.
+It answers common.authenticate and object.execute_kw (search, search_count, search_read, read, read_group, write,
+create, unlink, fields_get, check_object_reference) over XML-RPC and JSON-RPC, with a generated dataset and an
+optional latency added to each request (think network round trip):
+
+    $ python benchmarks/fake_server.py --records 10000 --latency 0.02 --port 8069
+
+From python:
+    >>> with FakeServer(records=10_000, latency=0.02) as server:
+    >>>     env = Environment(server.url, 'admin', 'admin', db='bench')
+"""
+import argparse
+import json
+import threading
+import time
+import xmlrpc.client
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xmlrpc.server import SimpleXMLRPCDispatcher
+
+UID = 2
+COUNTRIES = 250
+CATEGORIES = 20
+
+MODELS = {
+    'res.users': {
+        'id': {'type': 'integer', 'store': True, 'string': 'ID'},
+        'name': {'type': 'char', 'store': True, 'string': 'Name'},
+        'login': {'type': 'char', 'store': True, 'string': 'Login'},
+    },
+    'res.country': {
+        'id': {'type': 'integer', 'store': True, 'string': 'ID'},
+        'name': {'type': 'char', 'store': True, 'string': 'Name'},
+        'code': {'type': 'char', 'store': True, 'string': 'Code'},
+        'write_date': {'type': 'datetime', 'store': True, 'string': 'Last Updated on'},
+    },
+    'res.partner.category': {
+        'id': {'type': 'integer', 'store': True, 'string': 'ID'},
+        'name': {'type': 'char', 'store': True, 'string': 'Name'},
+        'write_date': {'type': 'datetime', 'store': True, 'string': 'Last Updated on'},
+    },
+    'res.partner': {
+        'id': {'type': 'integer', 'store': True, 'string': 'ID'},
+        'name': {'type': 'char', 'store': True, 'string': 'Name'},
+        'ref': {'type': 'char', 'store': True, 'string': 'Reference'},
+        'email': {'type': 'char', 'store': True, 'string': 'Email'},
+        'active': {'type': 'boolean', 'store': True, 'string': 'Active'},
+        'is_company': {'type': 'boolean', 'store': True, 'string': 'Is a Company'},
+        'credit_limit': {'type': 'float', 'store': True, 'string': 'Credit Limit'},
+        'comment': {'type': 'text', 'store': True, 'string': 'Notes'},
+        'country_id': {'type': 'many2one', 'relation': 'res.country', 'store': True, 'string': 'Country'},
+        'parent_id': {'type': 'many2one', 'relation': 'res.partner', 'store': True, 'string': 'Related Company'},
+        'child_ids': {'type': 'one2many', 'relation': 'res.partner', 'relation_field': 'parent_id', 'store': True, 'string': 'Contacts'},
+        'category_id': {'type': 'many2many', 'relation': 'res.partner.category', 'store': True, 'string': 'Tags'},
+        'write_date': {'type': 'datetime', 'store': True, 'string': 'Last Updated on'},
+    },
+    'ir.module.module': {
+        'id': {'type': 'integer', 'store': True, 'string': 'ID'},
+        'name': {'type': 'char', 'store': True, 'string': 'Technical Name'},
+        'state': {'type': 'selection', 'store': True, 'string': 'Status'},
+        'latest_version': {'type': 'char', 'store': True, 'string': 'Latest Version'},
+    },
+}
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class FakeOdoo:
+    """ In-memory database and ORM of the fake server, good enough for the calls the library makes """
+
+    def __init__(self, records: int = 1000):
+        self._lock = threading.Lock()
+        self.calls = list()         # (model, method) of each execute_kw
+        self.tables = {model: dict() for model in MODELS}
+        self._generate(records)
+
+    # --------------------------------------------
+    #                   PUBLIC
+    # --------------------------------------------
+
+
+    def authenticate(self, db, login, password, user_agent_env):
+        return UID
+
+    def version(self):
+        return {'server_version': '17.0', 'server_version_info': [17, 0, 0, 'final', 0, '']}
+
+    def execute_kw(self, db, uid, password, model, method, args, kw=None):
+        kw = dict(kw or dict())
+        context = kw.pop('context', None) or dict()
+        with self._lock:
+            self.calls.append((model, method))
+            if model not in MODELS:
+                raise xmlrpc.client.Fault(2, f"Object {model} doesn't exist")
+            if method == 'check_object_reference':
+                return ['res.partner', 1]
+            if method == 'fields_get':
+                attributes = kw.get('attributes')
+                return {
+                    name: {k: v for k, v in infos.items() if not attributes or k in attributes}
+                    for name, infos in MODELS[model].items()
+                }
+            if method in ['search', 'search_count', 'search_read']:
+                records = self._search(model, args[0] if args else kw.get('domain', []), context, **{
+                    k: kw.get(k) for k in ['order', 'limit', 'offset'] if method != 'search_count'
+                })
+                if method == 'search':
+                    return [record['id'] for record in records]
+                if method == 'search_count':
+                    return len(records)
+                return [self._format(model, record, kw.get('fields')) for record in records]
+            if method == 'read':
+                fields = kw.get('fields') or (args[1] if len(args) > 1 else None)
+                return [self._format(model, self.tables[model][res_id], fields) for res_id in args[0] if res_id in self.tables[model]]
+            if method == 'read_group':
+                return self._read_group(model, *args, context=context, **kw)
+            if method == 'write':
+                for res_id in args[0]:
+                    self._write(model, self.tables[model][res_id], args[1])
+                return True
+            if method == 'create':
+                vals_list = args[0] if isinstance(args[0], list) else [args[0]]
+                ids = [self._create(model, vals) for vals in vals_list]
+                return ids if isinstance(args[0], list) else ids[0]
+            if method == 'unlink':
+                for res_id in args[0]:
+                    self.tables[model].pop(res_id, None)
+                return True
+            raise xmlrpc.client.Fault(2, f"The method '{method}' does not exist on the model '{model}'")
+
+    # --------------------------------------------
+    #                   PRIVATE
+    # --------------------------------------------
+
+
+    def _generate(self, records: int):
+        self.tables['res.users'][UID] = {'id': UID, 'name': 'Mitchell Admin', 'login': 'admin'}
+        for i, name in enumerate(['base', 'contacts', 'sale', 'account'], 1):
+            self.tables['ir.module.module'][i] = {'id': i, 'name': name, 'state': 'installed', 'latest_version': '17.0.1.0'}
+        for i in range(1, COUNTRIES + 1):
+            self.tables['res.country'][i] = {'id': i, 'name': f"Country {i}", 'code': f"C{i}", 'write_date': now()}
+        for i in range(1, CATEGORIES + 1):
+            self.tables['res.partner.category'][i] = {'id': i, 'name': f"Tag {i}", 'write_date': now()}
+        for i in range(1, records + 1):
+            is_company = i % 10 == 1
+            self.tables['res.partner'][i] = {
+                'id': i,
+                'name': f"Partner {i}",
+                'ref': f"P{i:06d}",
+                'email': f"partner{i}@example.com",
+                'active': True,
+                'is_company': is_company,
+                'credit_limit': i * 1.5,
+                'comment': False,
+                'country_id': i % COUNTRIES + 1,
+                'parent_id': False if is_company else i - (i - 1) % 10,
+                'category_id': [i % CATEGORIES + 1] if i % 3 else [],
+                'write_date': now(),
+            }
+
+    def _format(self, model: str, record: dict, fields: list[str] = None) -> dict:
+        """ A record as read() returns it """
+        res = {'id': record['id']}
+        for name in fields or MODELS[model]:
+            infos = MODELS[model][name]
+            value = record.get(name, False)
+            if infos['type'] == 'one2many':
+                value = [r['id'] for r in self.tables[infos['relation']].values() if r.get(infos['relation_field']) == record['id']]
+            elif infos['type'] == 'many2one' and value:
+                value = [value, self.tables[infos['relation']][value]['name']]
+            res[name] = value
+        return res
+
+    def _values(self, model: str, record: dict, path: str) -> list:
+        """ Values of a (dotted) field path, flattened: ids for relational fields """
+        name, _, rest = path.partition('.')
+        infos = MODELS[model].get(name, {'type': 'integer'})
+        if infos['type'] == 'one2many':
+            values = [r['id'] for r in self.tables[infos['relation']].values() if r.get(infos['relation_field']) == record['id']]
+        elif infos['type'] == 'many2many':
+            values = list(record.get(name) or [])
+        elif infos['type'] == 'many2one':
+            values = [record[name]] if record.get(name) else []
+        else:
+            values = [record.get(name, False)]
+
+        if rest:
+            comodel = self.tables[infos['relation']]
+            return [value for res_id in values if res_id in comodel for value in self._values(infos['relation'], comodel[res_id], rest)]
+        return values
+
+    def _match_leaf(self, model: str, record: dict, leaf) -> bool:
+        path, operator, operand = leaf
+        values = [value for value in self._values(model, record, path) if value is not False]
+        if operand is False and operator in ['=', '!=']:
+            return bool(values) == (operator == '!=')
+        if operator in ['=', '!=']:
+            return (operand in values) == (operator == '=')
+        if operator in ['in', 'not in']:
+            return bool(set(values) & set(operand)) == (operator == 'in')
+        if operator in ['ilike', 'like']:
+            return any(str(operand).lower() in str(value).lower() for value in values)
+        comparisons = {'>': lambda a, b: a > b, '>=': lambda a, b: a >= b, '<': lambda a, b: a < b, '<=': lambda a, b: a <= b}
+        if operator in comparisons:
+            return any(comparisons[operator](value, operand) for value in values)
+        raise xmlrpc.client.Fault(2, f"Invalid operator {operator}")
+
+    def _match(self, model: str, record: dict, domain: list) -> bool:
+        """ Polish notation, like Odoo: '&' is implicit, '|' and '!' are supported """
+        stack = list()
+        for leaf in reversed(domain):
+            if leaf == '|':
+                stack.append(stack.pop() | stack.pop())
+            elif leaf == '&':
+                stack.append(stack.pop() & stack.pop())
+            elif leaf == '!':
+                stack.append(not stack.pop())
+            else:
+                stack.append(self._match_leaf(model, record, leaf))
+        return all(stack)
+
+    def _search(self, model: str, domain: list, context: dict, order: str = None, limit: int = None, offset: int = None) -> list[dict]:
+        active_test = context.get('active_test', True) and 'active' in MODELS[model]
+        active_test = active_test and not any(isinstance(leaf, (list, tuple)) and leaf[0] == 'active' for leaf in domain)
+        records = [
+            record for record in self.tables[model].values()
+            if (not active_test or record.get('active')) and self._match(model, record, domain)
+        ]
+        records.sort(key=lambda record: record['id'])
+        for part in reversed((order or '').split(',')):
+            if part.strip():
+                name, *direction = part.split()
+                records.sort(key=lambda record: (record.get(name) is False, record.get(name)), reverse=direction[:1] == ['desc'])
+        records = records[offset or 0:]
+        return records[:limit] if limit else records
+
+    def _read_group(self, model: str, domain: list, fields: list[str], groupby, context: dict = None, offset=0, limit=None, orderby=None, lazy=True):
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby)
+        groups = dict()
+        for record in self._search(model, domain, context or dict()):
+            key = tuple(record.get(name.split(':')[0], False) for name in groupby[:1 if lazy else None])
+            groups.setdefault(key, list()).append(record)
+
+        res = list()
+        for key, records in sorted(groups.items(), key=lambda item: str(item[0])):
+            group = {'__domain': domain, '__count': len(records)}
+            if groupby:
+                group[f"{groupby[0].split(':')[0]}_count"] = len(records)
+            for name, value in zip(groupby, key):
+                infos = MODELS[model][name.split(':')[0]]
+                group[name] = [value, self.tables[infos['relation']][value]['name']] if infos['type'] == 'many2one' and value else value
+                group['__domain'] = group['__domain'] + [(name.split(':')[0], '=', value)]
+            for spec in fields:
+                name, _, aggregator = spec.partition(':')
+                if aggregator or MODELS[model].get(name, {}).get('type') in ['integer', 'float']:
+                    values = [record.get(name) or 0 for record in records]
+                    aggregate = {'sum': sum, 'max': max, 'min': min, 'count': len, 'avg': lambda v: sum(v) / len(v)}
+                    group[name] = aggregate.get(aggregator or 'sum', sum)(values)
+            res.append(group)
+        res = res[offset or 0:]
+        return res[:limit] if limit else res
+
+    def _write(self, model: str, record: dict, vals: dict):
+        for name, value in vals.items():
+            if MODELS[model].get(name, {}).get('type') in ['one2many', 'many2many'] and isinstance(value, list):
+                value = self._apply_commands(record.get(name) or [], value)
+            record[name] = value
+        record['write_date'] = now()
+
+    def _create(self, model: str, vals: dict) -> int:
+        res_id = max(self.tables[model] or [0]) + 1
+        record = {'id': res_id, **{name: False for name in MODELS[model] if name != 'id'}, 'active': True}
+        self.tables[model][res_id] = record
+        self._write(model, record, vals)
+        return res_id
+
+    @staticmethod
+    def _apply_commands(ids: list[int], commands: list) -> list[int]:
+        ids = list(ids)
+        for command in commands:
+            if not isinstance(command, (list, tuple)):
+                ids.append(command)
+            elif command[0] == 4:
+                ids.append(command[1])
+            elif command[0] == 3:
+                ids = [res_id for res_id in ids if res_id != command[1]]
+            elif command[0] == 5:
+                ids = []
+            elif command[0] == 6:
+                ids = list(command[2])
+        return list(dict.fromkeys(ids))
+
+
+class FakeServer:
+    """ HTTP server exposing a FakeOdoo on /xmlrpc/2/{common,object,db} and /jsonrpc, in a background thread """
+
+    def __init__(self, records: int = 1000, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.odoo = FakeOdoo(records)
+        self.latency = latency
+        self._dispatchers = {service: SimpleXMLRPCDispatcher(allow_none=True) for service in ['common', 'object', 'db']}
+        self._dispatchers['common'].register_function(self.odoo.authenticate, 'authenticate')
+        self._dispatchers['common'].register_function(self.odoo.version, 'version')
+        self._dispatchers['object'].register_function(self.odoo.execute_kw, 'execute_kw')
+        self._dispatchers['db'].register_function(lambda: ['bench'], 'list')
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def calls(self):
+        return self.odoo.calls
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _dispatch(self, path: str, body: bytes) -> tuple[bytes, str]:
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path == '/jsonrpc':
+            request = json.loads(body)
+            params = request['params']
+            try:
+                result = self._dispatchers[params['service']]._dispatch(params['method'], params['args'])
+                response = {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+            except xmlrpc.client.Fault as e:
+                error = {'name': 'odoo.exceptions.UserError', 'debug': e.faultString, 'message': e.faultString}
+                response = {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': 200, 'message': 'Odoo Server Error', 'data': error}}
+            return json.dumps(response).encode(), 'application/json'
+
+        service = path.rsplit('/', 1)[-1]
+        return self._dispatchers[service]._marshaled_dispatch(body), 'text/xml'
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'         # Keep-alive
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                data, content_type = server._dispatch(self.path, body)
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10_000)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to each request")
+    parser.add_argument('--port', type=int, default=8069)
+    args = parser.parse_args()
+
+    server = FakeServer(records=args.records, latency=args.latency, port=args.port).start()
+    print(f"Fake Odoo server with {args.records} partners listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare XML-RPC and JSON-RPC on a typical `read` response: payload size, encode and decode time.
+No server needed, the payload is generated:
+
+    $ python benchmarks/protocols.py --records 20000
+"""
+import argparse
+import json
+import time
+import xmlrpc.client
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_payload(records: int) -> list[dict]:
+    return [
+        {
+            'id': i,
+            'name': f"Partner {i}",
+            'email': f"partner{i}@example.com",
+            'active': True,
+            'credit_limit': i * 1.5,
+            'country_id': [i % 250 + 1, f"Country {i % 250 + 1}"],
+            'category_id': list(range(i % 5)),
+            'comment': False,
+            'write_date': '2024-01-01 12:00:00',
+        }
+        for i in range(1, records + 1)
+    ]
+
+
+def measure(fn, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.records)
+    codecs = {
+        'xmlrpc': (
+            lambda: xmlrpc.client.dumps((payload,), methodresponse=True, allow_none=True).encode(),
+            lambda data: xmlrpc.client.loads(data)[0][0],
+        ),
+        'json': (
+            lambda: json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': payload}).encode(),
+            lambda data: json.loads(data)['result'],
+        ),
+    }
+    if orjson:
+        codecs['orjson'] = (
+            lambda: orjson.dumps({'jsonrpc': '2.0', 'id': 1, 'result': payload}),
+            lambda data: orjson.loads(data)['result'],
+        )
+
+    print(f"read() response of {args.records} records, best of {args.repeat}")
+    print(f"{'codec':<8} {'size (KB)':>10} {'encode (ms)':>12} {'decode (ms)':>12}")
+    for name, (encode, decode) in codecs.items():
+        data = encode()
+        assert len(decode(data)) == args.records
+        encode_time = measure(encode, args.repeat)
+        decode_time = measure(lambda: decode(data), args.repeat)
+        print(f"{name:<8} {len(data) / 1024:>10.0f} {encode_time * 1000:>12.1f} {decode_time * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
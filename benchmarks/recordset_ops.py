@@ -0,0 +1,72 @@
+"""
+Micro-benchmarks of RecordSet operations on big recordsets (`--records` ids), no server needed:
+set operations, membership, iteration, slicing and relational mapped() on a warm cache.
+
+    $ python benchmarks/recordset_ops.py --records 100000
+"""
+import argparse
+import time
+import tracemalloc
+from otools_rpc.external_api import Environment
+from otools_rpc.external_api.cache import CacheModel
+
+FIELDS = {
+    'id': {'type': 'integer', 'store': True},
+    'name': {'type': 'char', 'store': True},
+    'country_id': {'type': 'many2one', 'relation': 'res.country', 'store': True},
+    'category_id': {'type': 'many2many', 'relation': 'res.partner.category', 'store': True},
+}
+
+
+def measure(label: str, fn, repeat: int = 5):
+    """ Print the best time of `repeat` runs and the memory allocated by one of them """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    res = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<28} {best * 1000:>9.2f} {peak / 1024 ** 2:>10.2f}  {len(res) if hasattr(res, '__len__') else res}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100_000)
+    args = parser.parse_args()
+
+    env = Environment('http://localhost:8069', 'admin', 'admin', db='bench', auto_auth=False, log_level='WARNING', cache_default_expiration=3600)
+    env.user = {'id': 2}        # Offline: nothing is sent to the server
+    env.cache['res.partner'] = CacheModel(env.cache, 'res.partner', fields=FIELDS)
+    env.cache['res.country'] = CacheModel(env.cache, 'res.country', fields={'name': {'type': 'char', 'store': True}})
+    env.cache['res.partner.category'] = CacheModel(env.cache, 'res.partner.category', fields={'name': {'type': 'char', 'store': True}})
+    env.cache['res.partner'].update('read', None, [
+        {'id': res_id, 'name': f"Partner {res_id}", 'country_id': res_id % 250 + 1, 'category_id': [res_id % 50 + 1, res_id % 7 + 100]}
+        for res_id in range(1, args.records + 1)
+    ])
+
+    ids = list(range(1, args.records + 1))
+    partners = env['res.partner'].browse(ids)
+    evens = env['res.partner'].browse(ids[1::2])
+    half = partners[:args.records // 2]
+    record = partners[args.records - 1:]
+
+    print(f"{args.records} ids")
+    print(f"{'operation':<28} {'time (ms)':>9} {'peak (MB)':>10}  result")
+    measure("browse", lambda: env['res.partner'].browse(ids))
+    measure("union |", lambda: partners | evens)
+    measure("intersection &", lambda: half & evens)
+    measure("difference -", lambda: partners - evens)
+    measure("membership (x1000)", lambda: sum(record in partners for _ in range(1000)))
+    measure("iterate", lambda: sum(1 for _ in partners))
+    measure("slice [:half]", lambda: partners[:args.records // 2])
+    measure("mapped char", lambda: partners.mapped('name'))
+    measure("mapped many2one", lambda: partners.mapped('country_id'))
+    measure("mapped many2many", lambda: partners.mapped('category_id'))
+
+
+if __name__ == '__main__':
+    main()
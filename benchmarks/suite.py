@@ -0,0 +1,211 @@
+"""
+End-to-end benchmarks of the library against a local fake Odoo server (see fake_server.py), no real server needed.
+Each scenario runs on a fresh Environment and reports wall time, round trips, bytes exchanged and peak memory:
+
+    $ python benchmarks/suite.py --records 10000 --latency 0.005 --protocol jsonrpc
+    $ python benchmarks/suite.py --scenario iterate --scenario mapped_dotted
+
+Peak memory is measured in a separate run with tracemalloc, so it doesn't slow down the timed one.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from otools_rpc.external_api import AsyncEnvironment, Environment
+from fake_server import FakeServer
+
+FIELDS = ['name', 'ref', 'email', 'is_company', 'credit_limit', 'country_id', 'parent_id', 'category_id']
+SCENARIOS = dict()
+
+
+def scenario(setup=None):
+    """ Register a scenario, `setup(env, partners)` is run before it, outside of measures """
+    def decorator(fn):
+        fn.setup = setup
+        SCENARIOS[fn.__name__] = fn
+        return fn
+    return decorator
+
+
+# --------------------------------------------
+#                  SCENARIOS
+# --------------------------------------------
+# Each scenario gets a fresh environment and its partners (ids only), and returns a short description
+
+
+@scenario()
+def iterate(env, partners):
+    """ Dotted notation on each record (cold cache): siblings are prefetched """
+    names = [partner.name for partner in partners]
+    return f"{len(names)} names"
+
+
+@scenario(setup=lambda env, partners: partners.read(['name']))
+def iterate_cached(env, partners):
+    """ Same, on a warm cache: measures the hit path """
+    start = time.perf_counter()
+    for partner in partners:
+        partner.name
+    return f"{(time.perf_counter() - start) / len(partners) * 1e6:.2f} us per hit"
+
+
+@scenario()
+def mapped(env, partners):
+    countries = partners.mapped('country_id')
+    return f"{len(countries)} countries"
+
+
+@scenario()
+def mapped_dotted(env, partners):
+    codes = partners.mapped('parent_id.country_id.code')
+    return f"{len(codes)} codes"
+
+
+@scenario()
+def read(env, partners):
+    rows = partners.read(FIELDS)
+    return f"{len(rows)} rows x {len(FIELDS)} fields"
+
+
+@scenario(setup=lambda env, partners: partners[:len(partners) // 2].read(FIELDS))
+def read_cached(env, partners):
+    """ read(use_cache=True) with half of the records already in cache """
+    rows = partners.read(FIELDS, use_cache=True)
+    return f"{len(rows)} rows, {env.cache.stats['served']} values served by the cache"
+
+
+@scenario()
+def read_concurrent(env, partners):
+    """ Chunked read sent by 4 threads """
+    env.max_workers = 4
+    env.chunk_size = max(len(partners) // 8, 1)
+    rows = partners.read(FIELDS)
+    return f"{len(rows)} rows in chunks of {env.chunk_size}"
+
+
+@scenario()
+def search_read_paginated(env, partners):
+    count = sum(1 for _ in env['res.partner'].iter_search_read([], FIELDS, batch_size=1000))
+    return f"{count} rows"
+
+
+@scenario()
+def export_dicts(env, partners):
+    """ Columns built from the dicts of search_read, what a DataFrame constructor does """
+    rows = list(env['res.partner'].iter_search_read([], FIELDS, batch_size=1000, update_cache=False))
+    columns = {field: [row[field] for row in rows] for field in ['id'] + FIELDS}
+    return f"{len(columns['id'])} rows"
+
+
+@scenario()
+def export_columns(env, partners):
+    """ Same data with read_columns(): no dict kept per row, compact buffers """
+    columns = env['res.partner'].read_columns([], FIELDS, batch_size=1000)
+    return f"{len(columns)} rows, {len(columns['country_id.name'].categories)} distinct countries"
+
+
+@scenario()
+def total_mapped(env, partners):
+    """ Totals per country computed locally, every row is transferred """
+    totals = dict()
+    for row in partners.read(['country_id', 'credit_limit']):
+        totals[row['country_id'] and row['country_id'][0]] = totals.get(row['country_id'] and row['country_id'][0], 0) + row['credit_limit']
+    return f"{len(totals)} totals"
+
+
+@scenario()
+def total_aggregate(env, partners):
+    """ Same totals with aggregate(): only the groups are transferred """
+    groups = env['res.partner'].aggregate([], 'country_id', ['credit_limit:sum'])
+    return f"{len(groups)} totals, sum() = {partners.sum('credit_limit'):.0f}"
+
+
+@scenario()
+def write_batch(env, partners):
+    with env.batch():
+        for partner in partners[:1000]:
+            partner.write({'comment': 'Benchmarked'})
+    return f"{min(len(partners), 1000)} writes"
+
+
+@scenario()
+def create_unlink(env, partners):
+    created = env['res.partner'].create([{'name': f"New {i}"} for i in range(1000)])
+    created.unlink()
+    return f"{len(created)} created and deleted"
+
+
+@scenario()
+def async_gather(env, partners):
+    """ 20 concurrent reads on an AsyncEnvironment (needs httpx) """
+    async def run():
+        async with AsyncEnvironment(env._url, 'admin', 'admin', db='bench', log_level='WARNING', protocol=env.protocol) as async_env:
+            async_env.instrumentation = env.instrumentation        # Report its calls in the results
+            chunk = max(len(partners) // 20, 1)
+            chunks = [async_env['res.partner'].browse(partners.ids[i:i + chunk]) for i in range(0, len(partners), chunk)]
+            results = await asyncio.gather(*(records.read(FIELDS) for records in chunks))
+            return sum(map(len, results))
+
+    return f"{asyncio.run(run())} rows"
+
+
+# --------------------------------------------
+#                   RUNNER
+# --------------------------------------------
+
+
+def run_scenario(fn, server: FakeServer, args, trace_memory: bool = False) -> dict:
+    env = Environment(server.url, 'admin', 'admin', db='bench', log_level='WARNING', protocol=args.protocol, cache_default_expiration=600)
+    partners = env['res.partner'].search([])
+    if fn.setup:
+        fn.setup(env, partners)
+    env.instrumentation.reset()
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    description = fn(env, partners)
+    duration = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory:
+        tracemalloc.stop()
+
+    stats = env.instrumentation.summary()
+    env.pool.close()
+    return {
+        'duration': duration,
+        'calls': env.requests_count,
+        'sent': sum(stat['request_size'] for stat in stats),
+        'received': sum(stat['response_size'] for stat in stats),
+        'peak': peak,
+        'description': description,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10_000)
+    parser.add_argument('--latency', type=float, default=0.002, help="Seconds added to each request by the server")
+    parser.add_argument('--protocol', default='xmlrpc', choices=['xmlrpc', 'jsonrpc'])
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the memory run")
+    args = parser.parse_args()
+
+    print(f"{args.records} partners, {args.latency * 1000:.0f} ms of latency per request, {args.protocol}")
+    print(f"{'scenario':<22} {'time (ms)':>10} {'calls':>6} {'sent (KB)':>10} {'recv (KB)':>10} {'peak (MB)':>10}  details")
+    with FakeServer(records=args.records, latency=args.latency) as server:
+        for name in args.scenario or SCENARIOS:
+            try:
+                res = run_scenario(SCENARIOS[name], server, args)
+                peak = None if args.no_memory else run_scenario(SCENARIOS[name], server, args, trace_memory=True)['peak']
+            except ImportError as e:
+                print(f"{name:<22} skipped: {e}")
+                continue
+            print(
+                f"{name:<22} {res['duration'] * 1000:>10.1f} {res['calls']:>6} {res['sent'] / 1024:>10.0f} "
+                f"{res['received'] / 1024:>10.0f} {peak / 1024 ** 2 if peak is not None else float('nan'):>10.1f}  {res['description']}"
+            )
+
+
+if __name__ == '__main__':
+    main()
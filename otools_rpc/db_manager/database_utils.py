@@ -1,16 +1,19 @@
 from loguru import logger
 import requests
-import xmlrpc.client
+from ..external_api.transport import ConnectionPool, server_proxy
 
 
 class DBManager:
-    def __init__(self, url: str, password: str):
+    def __init__(self, url: str, password: str, pool: ConnectionPool = None, timeout: float = None):
         # --------------------------------------------
         #                   PRIVATE
         # --------------------------------------------
 
         self._url = url[:-1] if url[-1] == "/" else url
         self._password = password
+        self._pool = pool or ConnectionPool(self._url, timeout=timeout)       # Pass env.pool to share its connections
+        self._session = requests.Session()
+        self._timeout = timeout
 
         self._duplicate_url = "{}/web/database/duplicate".format(self._url)
         self._drop_url = "{}/web/database/drop".format(self._url)
@@ -20,25 +23,26 @@ class DBManager:
         #                   PUBLIC
         # --------------------------------------------
 
-        self.dbobject = xmlrpc.client.ServerProxy("{}/xmlrpc/2/db".format(self._url))
+        self.dbobject = server_proxy("{}/xmlrpc/2/db".format(self._url), self._pool)
 
     def duplicate(self, db, new_name):
-        res = requests.post(
+        res = self._session.post(
             self._duplicate_url,
             data={"master_pwd": self._password, "name": db, "new_name": new_name},
+            timeout=self._timeout,
         )
         return res
 
     def drop(self, db):
-        res = requests.post(
-            self._drop_url, data={"master_pwd": self._password, "name": db}
+        res = self._session.post(
+            self._drop_url, data={"master_pwd": self._password, "name": db}, timeout=self._timeout
         )
         return res
 
     def create(
         self, db, login: str, password: str, demo: bool = False, lang: str = "en_US"
     ):
-        res = requests.post(
+        res = self._session.post(
             self._create_url,
             data={
                 "master_pwd": self._password,
@@ -50,6 +54,7 @@ class DBManager:
                 "phone": False,
                 "country_code": False,
             },
+            timeout=self._timeout,
         )
         return res
 
@@ -1,3 +1,7 @@
 from .environment import Environment
 from .recordset import RecordSet
 from .cache import Cache
+from .cache_backends import CacheBackend, MemoryBackend, SQLiteBackend
+from .columns import Columns
+from .async_environment import AsyncEnvironment
+from .async_recordset import AsyncRecordSet
@@ -0,0 +1,170 @@
+import asyncio
+import xmlrpc.client
+from typing import Callable
+from .async_recordset import AsyncRecordSet
+from .cache import CacheModel
+from .environment import Environment
+from .instrumentation import add_transfer
+from .metadata import FIELDS_ATTRIBUTES, MODULES_DOMAIN, MODULES_FIELDS
+from .parallel import ParallelResult, async_parallel_map
+from .transport import json_dumps, json_loads
+from .utils import is_relational_field
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncEnvironment(Environment):
+    """
+    asyncio version of Environment: calls are awaitable and share one keep-alive HTTP client, so hundreds of them
+    can run concurrently on the same event loop. Requires httpx (pip install otools-rpc[async]).
+    >>> async with AsyncEnvironment(url, username, password, db=db) as env:
+    >>>     partners = await env['res.partner'].search([('is_company', '=', True)])
+    """
+
+    def __init__(
+            self,
+            url: str,
+            username: str,
+            password: str,
+            db: str = None,
+            max_connections: int = 100,
+            timeout: float = 120,
+            **kw
+    ):
+        if httpx is None:
+            raise ImportError("AsyncEnvironment requires httpx, install it with: pip install otools-rpc[async]")
+
+        kw['auto_auth'] = False         # Authentication needs the event loop, see __aenter__()
+        super().__init__(url, username, password, db=db, timeout=timeout, **kw)
+
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self._loading_models = dict()
+
+    def __missing__(self, key):
+        return AsyncRecordSet(key, self, context=self._context)
+
+    async def __aenter__(self):
+        if not self.user:
+            await self.authenticate()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # --------------------------------------------
+    #                   PUBLIC
+    # --------------------------------------------
+
+
+    async def authenticate(self):
+        uid = await self.call('common', 'authenticate', self._db, self._username, self._password, {})
+        if uid:
+            self.user = {'id': uid}
+            self.user |= (await self['res.users'].browse(uid).read(['name', 'login']))[0]
+            self.logger.info(f"Login successful on {self._url} ({self._db}) with res.users({uid}) - {self.user.get('name')} ({self.user.get('login')})")
+        else:
+            self.logger.error(f"Login failed on {self._url} ({self._db}) for {self._username}")
+
+    async def ref(self, xmlid):
+        module, xml_id = xmlid.split(".")
+        res = await self['ir.model.data'].check_object_reference(module, xml_id)
+        if res:
+            return self[res[0]].browse(res[1])
+        return None
+
+    async def call(self, service: str, method: str, *args):
+        """ Non-blocking equivalent of env.common.method(*args) / env.models.method(*args) """
+        if self.protocol == 'jsonrpc':
+            return await self._call_jsonrpc(service, method, *args)
+
+        body = xmlrpc.client.dumps(args, method, allow_none=True).encode()
+        response = await self._client.post(f"{self._url}/xmlrpc/2/{service}", content=body, headers={'Content-Type': 'text/xml'})
+        response.raise_for_status()
+        add_transfer(len(body), len(response.content))
+        return xmlrpc.client.loads(response.content)[0][0]
+
+    async def load_model(self, name: str, fields: set[str] = None) -> CacheModel:
+        """
+        Fetch once the metadata of model `name` and create its CacheModel, without blocking the event loop
+        Comodels of the relational `fields` are loaded too, as storing these fields in cache also touches them
+        """
+        if name not in self._loading_models:
+            self._loading_models[name] = asyncio.ensure_future(self._load_model(name))
+        try:
+            model_cache = await self._loading_models[name]
+        except Exception:
+            del self._loading_models[name]      # Allow a retry
+            raise
+
+        comodels = {
+            model_cache.fields[field]['relation'] for field in (fields or set())
+            if model_cache.field_exists(field) and is_relational_field(model_cache.fields[field]['type'])
+        }
+        await asyncio.gather(*(self.load_model(comodel) for comodel in comodels if comodel != name))
+        return model_cache
+
+    async def poll_cache_changes(self) -> int:
+        """ Non-blocking equivalent of env.cache.poll_changes() """
+        count = 0
+        for model_cache, domain, kw in self.cache._poll_requests():
+            rows = await self[model_cache.name]._execute('search_read', domain, **kw)
+            res_ids, fields = self.cache._invalidate(model_cache.name, self.cache._poll_result(model_cache, rows))
+            if fields:
+                await self[model_cache.name].browse(res_ids).read(fields)
+            count += len(res_ids)
+        return count
+
+    async def map(
+            self,
+            fn: Callable,
+            records: AsyncRecordSet,
+            chunk_size: int = None,
+            workers: int = None,
+            rate: float = None,
+            retries: int = 2,
+            retry_unsafe: bool = False,
+    ) -> ParallelResult:
+        """
+        See Environment.map(), `fn` is a coroutine function and up to `workers` chunks are in flight on the event loop
+        >>> res = await env.map(lambda moves: moves.action_post(), invoices, chunk_size=50, workers=4)
+        """
+        return await async_parallel_map(self, fn, records, chunk_size=chunk_size, workers=workers, rate=rate, retries=retries, retry_unsafe=retry_unsafe)
+
+    async def close(self):
+        await self._client.aclose()
+
+    # --------------------------------------------
+    #                   PRIVATE
+    # --------------------------------------------
+
+
+    async def _call_jsonrpc(self, service: str, method: str, *args):
+        """ Same as transport.JsonRpcProxy, errors are raised as xmlrpc.client.Fault too """
+        body = json_dumps({'jsonrpc': '2.0', 'method': 'call', 'params': {'service': service, 'method': method, 'args': args}})
+        response = await self._client.post(f"{self._url}/jsonrpc", content=body, headers={'Content-Type': 'application/json'})
+        response.raise_for_status()
+        add_transfer(len(body), len(response.content))
+        res = json_loads(response.content)
+        if error := res.get('error'):
+            details = error.get('data') or dict()
+            raise xmlrpc.client.Fault(error.get('code'), details.get('debug') or details.get('message') or error.get('message'))
+        return res.get('result')
+
+    async def _load_model(self, name: str) -> CacheModel:
+        if name not in self.cache:
+            fields_file = self.cache.fields_file
+            if fields_file and not fields_file.loaded:
+                fields_file.load(await self['ir.module.module']._execute('search_read', MODULES_DOMAIN, MODULES_FIELDS))
+
+            fields = self.cache.stored_fields(name)
+            if fields is None:
+                fields = await self[name]._execute('fields_get', attributes=FIELDS_ATTRIBUTES)
+                self.cache.store_fields(name, fields)
+            self.cache.setdefault(name, CacheModel(self.cache, name, fields=fields))
+        return self.cache[name]
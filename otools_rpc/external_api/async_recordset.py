@@ -0,0 +1,457 @@
+import asyncio
+import inspect
+import xmlrpc.client
+from .columns import Columns
+from .common import log_request, model
+from .query_cache import _MISSING
+from .recordset import SERVER_TESTABLE_TYPES, RecordSet
+from .utils import is_relational_field, path_tree, split_every
+from typing import Union
+
+
+class AsyncRecordSet(RecordSet):
+    """
+    asyncio version of RecordSet, returned by AsyncEnvironment. Every call to the server is a coroutine:
+    >>> partners = await env['res.partner'].search([('is_company', '=', True)])
+    >>> names = await partners.mapped('name')
+    >>> name = await partners[:1].name          # Dotted notation is awaitable too
+    >>> await partners.action_archive()         # And so are custom methods
+    The cache is the same as the synchronous one, its models are loaded with non-blocking calls when needed.
+    """
+    __slots__ = ()
+
+    def __getattr__(self, attr):
+        return _AsyncAttribute(self, attr)
+
+    def __setattr__(self, attr, value):
+        if attr[0] != '_':
+            raise TypeError(f"Fields can't be assigned on {self}, use: await records.write({{'{attr}': value}})")
+        object.__setattr__(self, attr, value)
+
+    # --------------------------------------------
+    #                   PRIVATE
+    # --------------------------------------------
+
+
+    @log_request
+    async def _execute(self, method, *args, **kw):
+        """ Add ids in args if method is not @model decorated"""
+        if not (m := getattr(self, method, None)) or (getattr(m, '_api', None) != 'model'):
+            args = [self._ids] + list(args)
+        kw['context'] = self.context | kw.get('context', dict())
+
+        try:
+            return await self._env.call(
+                'object',
+                'execute_kw',
+                self._env._db,
+                self._env.uid,
+                self._env._password,
+                self._name,
+                method,
+                args,
+                kw,
+            )
+
+        except Exception as e:
+            if isinstance(e, xmlrpc.client.Fault) and 'cannot marshal' in str(e):
+                return None
+            self.logger.error(f"Error while executing {self._name}.{method}():")
+            self.logger.debug(f"args / kwargs:\n {args} \n {kw}")
+            self.logger.error("Odoo API Response:\n" + str(e).replace('\\n', '\n'))
+            raise e
+
+    async def _execute_chunked(self, method, *args, **kw):
+        """
+        Same as RecordSet._execute_chunked(), with at most `env.max_workers` chunks in flight on the event loop
+        Results are still yielded in order
+        """
+        semaphore = asyncio.Semaphore(max(self._env.max_workers, 1))
+
+        async def execute(records):
+            async with semaphore:
+                return await records._execute(method, *args, **kw)
+
+        chunks = [self._new(tuple(ids)) for ids in split_every(self._env.chunk_size, self._ids) if ids] or [self]
+        tasks = [asyncio.ensure_future(execute(records)) for records in chunks]
+        try:
+            for records, task in zip(chunks, tasks):
+                yield records, await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _query(self, method: str, domain: list[tuple], **kw):
+        """ See RecordSet._query() """
+        domain = self._format_domain(domain)
+        if not self._env.query_cache_ttl:
+            return await self._execute(method, domain, **kw)
+
+        key = self._env.query_cache.key(method, domain, kw, self._context)
+        res = self._env.query_cache.get(self._name, key)
+        if res is _MISSING:
+            res = await self._execute(method, domain, **kw)
+            self._env.query_cache.set(self._name, key, res, self._env.query_cache_ttl)
+        return res
+
+    async def _update_cache(self, op, res, *args, **kwargs):
+        """ Load (without blocking) the cache models that will be touched before updating the cache """
+        if not self.env.cache_enabled:
+            if op != 'read':
+                self._env.query_cache.invalidate()
+            return
+        if op == 'read':
+            fields = {field for rec_dict in res for field in rec_dict}
+        elif op in ['create', 'write']:
+            fields = {field for vals in (args[0] if isinstance(args[0], list) else [args[0]]) for field in vals}
+        else:
+            fields = set()
+        await self._env.load_model(self._name, fields=fields)
+
+        post_update = super()._update_cache(op, res, *args, **kwargs)
+        if inspect.isawaitable(post_update):
+            await post_update
+
+    async def _get_field(self, field: str):
+        """ Awaitable dotted notation: read expired values (with siblings, see RecordSet._prefetch_ids) then use the cache """
+        model_cache = await self._env.load_model(self._name)
+        if not model_cache.field_exists(field):
+            raise AttributeError(f"Field {field} does not exist on model {self._name}")
+        if len(self._ids) != 1:
+            return await self.mapped(field)
+        await self._check_cache_changes()
+
+        if model_cache.is_expired(self.id, field):
+            res_ids = model_cache.prefetch_candidates(field, self.id, self._prefetch_ids)
+            await self._recordset(res_ids).read(model_cache._prefetch_fields(field))
+        return model_cache[self.id][field].get()
+
+    # --------------------------------------------
+    #                   ORM
+    # --------------------------------------------
+
+
+    @model
+    async def check_object_reference(self, module, xml_id):
+        if self._name != 'ir.model.data':
+            return await self._env['ir.model.data'].check_object_reference(module, xml_id)
+        return await self._execute('check_object_reference', module, xml_id)
+
+
+    # --- CRUD ---
+
+
+    @model
+    async def search(self, domain: list[tuple], **kw):
+        ids = await self._query('search', domain, **kw)
+        return self._recordset(ids)
+
+    async def read(self, fields: list[str] = None, use_cache: bool = False, **kw) -> list[dict]:
+        fields = fields or list()
+        if use_cache and fields and self.env.cache_enabled:
+            return await self._read_from_cache(fields, **kw)
+
+        res = list()
+        async for records, chunk_res in self._execute_chunked('read', fields=fields, **kw):
+            await records._update_cache('read', chunk_res, fields=fields, **kw)
+            res += chunk_res
+        return res
+
+    async def _read_from_cache(self, fields: list[str], **kw) -> list[dict]:
+        model_cache = await self._env.load_model(self._name, fields=set(fields))
+        await self._check_cache_changes()
+        res, groups = model_cache.read_plan(self._ids, fields)
+        for ids, missing_fields in groups:
+            fetched = {rec_dict['id']: rec_dict for rec_dict in await self._recordset(ids).read(missing_fields, **kw)}
+            for res_id in ids:
+                if res_id in fetched:
+                    res[res_id].update(fetched[res_id])
+                else:
+                    del res[res_id]
+        return [res[res_id] for res_id in self._ids if res_id in res]
+
+    @model
+    async def search_read(self, domain: list[tuple], fields: list[str] = None, **kw):
+        fields = fields or list()
+        res = await self._execute('search_read', self._format_domain(domain), fields=fields, **kw)
+        records = self._recordset([r.get('id') for r in res])
+        await records._update_cache('read', res, fields=fields)
+        return records
+
+    @model
+    async def iter_search_read(self, domain: list[tuple], fields: list[str] = None, batch_size: int = None, as_records: bool = False, update_cache: bool = True, **kw):
+        """ Async generator version of RecordSet.iter_search_read() """
+        paging = [key for key in ['order', 'limit', 'offset'] if key in kw]
+        if paging:
+            raise TypeError(f"iter_search_read() pages by id with `batch_size` itself, {paging} can't be given")
+        fields = fields or list()
+        batch_size = batch_size or self._env.chunk_size or 1000
+        domain = self._format_domain(domain)
+        last_id = 0
+
+        while True:
+            res = await self._execute('search_read', [['id', '>', last_id]] + domain, fields=fields, order='id', limit=batch_size, **kw)
+            batch_ids = [r['id'] for r in res]
+            if update_cache or as_records:
+                await self._recordset(batch_ids)._update_cache('read', res, fields=fields)
+
+            for rec_dict in res:
+                yield self._recordset(rec_dict['id'], prefetch_ids=batch_ids) if as_records else rec_dict
+
+            if len(res) < batch_size:
+                return
+            last_id = batch_ids[-1]
+
+    @model
+    async def search_count(self, domain: list[tuple]):
+        return await self._query('search_count', domain)
+
+    @model
+    async def read_group(self, domain: list[tuple], fields: list[str], groupby: Union[str, list[str]], **kw) -> list[dict]:
+        return await self._execute('read_group', self._format_domain(domain), fields, groupby, **kw)
+
+    @model
+    async def create(self, vals_list: Union[dict, list[dict]]):
+        vals_list = vals_list if isinstance(vals_list, list) else [vals_list]
+        ids = await self._execute('create', vals_list)
+        records = self._recordset(ids)
+        await records._update_cache('create', records, vals_list)
+        return records
+
+    async def write(self, vals: dict):
+        res = True
+        async for records, chunk_res in self._execute_chunked('write', vals):
+            await records._update_cache('write', chunk_res, vals)
+            res = res and chunk_res
+        return res
+
+    async def unlink(self):
+        res = True
+        async for records, chunk_res in self._execute_chunked('unlink'):
+            await records._update_cache('delete', chunk_res)
+            res = res and chunk_res
+        return res
+
+    @model
+    async def upsert(self, vals_list: Union[dict, list[dict]], key_fields: Union[str, list[str]]):
+        """ See RecordSet.upsert() """
+        await self._env.load_model(self._name)
+        vals_list = vals_list if isinstance(vals_list, list) else [vals_list]
+        key_fields = [key_fields] if isinstance(key_fields, str) else list(key_fields)
+        pending = self._upsert_prepare(vals_list, key_fields)
+
+        fields, domains = self._upsert_search(pending, key_fields)
+        rows = list()
+        for domain in domains:
+            rows += await self._execute('search_read', domain, fields=fields, order='id', context={'active_test': False})
+        await self._update_cache('read', rows, fields=fields)
+        ids, creates, writes = self._upsert_split(pending, key_fields, rows)
+
+        for chunk in split_every(self._env.chunk_size, creates):
+            vals_chunk = [vals for key, vals in chunk]
+            records = self._recordset(await self._execute('create', vals_chunk))
+            await records._update_cache('create', records, vals_chunk, reread=False)
+            ids.update(zip([key for key, vals in chunk], records._ids))
+
+        for changes, res_ids in writes:
+            async for records, res in self._recordset(res_ids)._execute_chunked('write', changes):
+                await records._update_cache('write', res, changes, reread=False)
+
+        return self._recordset([ids[self._upsert_key(vals, key_fields)] for vals in vals_list])
+
+    async def to_columns(self, fields: list[str]) -> Columns:
+        columns = Columns(fields, (await self._env.load_model(self._name)).fields)
+        async for records, rows in self._execute_chunked('read', fields=fields):
+            columns.extend(rows)
+        return columns
+
+    @model
+    async def read_columns(self, domain: list[tuple], fields: list[str], batch_size: int = None, **kw) -> Columns:
+        columns = Columns(fields, (await self._env.load_model(self._name)).fields)
+        batch_size = batch_size or self._env.chunk_size or 1000
+        rows = list()
+        async for row in self.iter_search_read(domain, fields, batch_size=batch_size, update_cache=False, **kw):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                columns.extend(rows)
+                rows = list()
+        columns.extend(rows)
+        return columns
+
+    async def parallel_call(self, method: str, *args, chunk_size: int = None, workers: int = None, rate: float = None, retries: int = 2, retry_unsafe: bool = False, **kw):
+        """ See RecordSet.parallel_call(), chunks are called concurrently on the event loop """
+        return await self._env.map(
+            lambda records: records._execute(method, *args, **kw), self,
+            chunk_size=chunk_size, workers=workers, rate=rate, retries=retries, retry_unsafe=retry_unsafe,
+        )
+
+    async def copy(self):
+        res_id = await self._execute('copy')
+        return self._recordset(res_id)
+
+
+    # --- ORM helpers ---
+
+
+    async def mapped(self, field: str):
+        """ Perform a read of the records having a dirty cache only, `field` can be a dotted path (see prefetch()) """
+        if '.' in field:
+            if not self.env.cache_enabled:
+                raise EnvironmentError("You must activate cache to use dotted paths in mapped()")
+            await self.prefetch(field)
+            *relations, field = field.split('.')
+            records = self
+            for relation in relations:
+                records = await records.mapped(relation)
+            return await records.mapped(field)
+
+        model_cache = await self._env.load_model(self._name)
+        await self._check_cache_changes()
+        read_res = list()
+        if not self.env.cache_enabled or self.cache_expired(field):
+            read_res = await self.read([field], use_cache=True)
+            if not self.env.cache_enabled:
+                return [rec.get(field) for rec in read_res]
+
+        values = model_cache.raw_values(self._ids, field, read_res)
+        missing = [res_id for res_id, value in zip(self._ids, values) if value is _MISSING]
+        if missing:
+            values = model_cache.raw_values(self._ids, field, read_res + await self._recordset(missing).read([field]))
+        values = [value for value in values if value is not _MISSING]
+        field_type = self.get_field_info(field, 'type')
+        if field_type == 'many2one':
+            ids = dict.fromkeys(value for value in values if value)
+        elif field_type in ['one2many', 'many2many']:
+            ids = dict.fromkeys(res_id for value in values for res_id in value)
+        else:
+            return values
+        return self._env[self.get_field_info(field, 'relation')].with_context(**self.context)._new(tuple(ids))
+
+    @model
+    async def aggregate(
+            self,
+            domain: list[tuple],
+            groupby: Union[str, list[str]],
+            measures: list[str],
+            lazy: bool = False,
+            orderby: str = None,
+            page_size: int = None,
+            cache_ttl: float = None,
+    ) -> list[dict]:
+        """ See RecordSet.aggregate() """
+        await self._env.load_model(self._name, fields={spec.split(':')[0] for spec in ([groupby] if isinstance(groupby, str) else groupby or [])})
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby or [])
+        domain = self._format_domain(domain)
+        key = self._env.query_cache.key('read_group', domain, groupby, measures, lazy, orderby, self._context)
+        if cache_ttl and (res := self._env.query_cache.get(self._name, key)) is not _MISSING:
+            return [dict(group) for group in res]
+
+        res, page_size, offset = list(), page_size or self._env.chunk_size or 1000, 0
+        while True:
+            kw = {'orderby': orderby} if orderby else dict()
+            groups = await self.read_group(domain, measures, groupby, offset=offset, limit=page_size, lazy=lazy, **kw)
+            res += [self._aggregate_group(group, groupby, measures) for group in groups]
+            if len(groups) < page_size:
+                break
+            offset += page_size
+
+        if cache_ttl:
+            self._env.query_cache.set(self._name, key, [dict(group) for group in res], cache_ttl)
+        return res
+
+    async def sum(self, field: str, domain: list[tuple] = None) -> float:
+        total = 0
+        for records, domain in self._aggregate_domains(domain):
+            total += sum(group.get(field) or 0 for group in await records.read_group(domain, [f"{field}:sum"], [], lazy=False))
+        return total
+
+    async def count(self, domain: list[tuple] = None) -> int:
+        return sum([await records.search_count(domain) for records, domain in self._aggregate_domains(domain)])
+
+    async def prefetch(self, paths: Union[str, list[str]]) -> "AsyncRecordSet":
+        level = {self._name: (dict.fromkeys(self._ids), path_tree([paths] if isinstance(paths, str) else paths))}
+        while level:
+            next_level = dict()
+            for model_name, (ids, tree) in level.items():
+                await self._env.load_model(model_name, fields=set(tree))
+                rows = await self._env[model_name].with_context(**self.context).browse(list(ids)).read(list(tree), use_cache=True) if ids else []
+                self._prefetch_next_level(next_level, model_name, rows, tree)
+            level = next_level
+        return self
+
+    async def filtered(self, func: Union[callable, str, list]):
+        """ See RecordSet.filtered(), `func` can also be a coroutine function """
+        if isinstance(func, list):
+            return await self.filtered_domain(func)
+        if isinstance(func, str):
+            name = func
+            if await self._stored_field_type(name) in SERVER_TESTABLE_TYPES:
+                return await self.filtered_domain([(name, '!=', False)])
+            await self.prefetch(name)
+            if '.' in name:
+                kept = [any(await rec.mapped(name)) for rec in self]
+            else:
+                # One value per record (ids for relations), mapped() would merge the relations
+                values = (await self._env.load_model(self._name)).raw_values(self._ids, name)
+                kept = [value is not _MISSING and bool(value) for value in values]
+            return self._new(tuple(res_id for res_id, keep in zip(self._ids, kept) if keep))
+
+        res_ids = list()
+        for rec in self:
+            res = func(rec)
+            if res if not inspect.isawaitable(res) else await res:
+                res_ids.append(rec.id)
+        return self._recordset(res_ids)
+
+    async def filtered_domain(self, domain: list[tuple]):
+        found = set()
+        for ids in split_every(self._env.chunk_size, self._ids):
+            found.update((await self.search([('id', 'in', ids)] + domain, context={'active_test': False})).ids)
+        return self._new(tuple(res_id for res_id in self._ids if res_id in found))
+
+    async def sorted(self, key: Union[callable, str] = None, reverse: bool = False):
+        """ See RecordSet.sorted(), a callable `key` can't be a coroutine function (prefetch values first) """
+        if callable(key):
+            return self._recordset([rec.id for rec in sorted(self, key=key, reverse=reverse)])
+
+        ids = (await self.search([('id', 'in', self._ids)], order=key, context={'active_test': False})).ids if self._ids else []
+        return self._recordset(ids[::-1] if reverse else ids)
+
+    async def _check_cache_changes(self):
+        if self._env.cache.poll_due:
+            await self._env.poll_cache_changes()
+
+    def get_field_info(self, field: str, info: str):
+        """ Like RecordSet.get_field_info(), for the attributes kept by the cache only (FIELDS_ATTRIBUTES): None for the others """
+        if not self.model_cache.field_exists(field):
+            return None
+        return self.model_cache.fields[field].get(info)
+
+    async def _stored_field_type(self, path: str) -> str:
+        model_name = self._name
+        *relations, field = path.split('.')
+        for relation in relations:
+            infos = (await self._env.load_model(model_name)).fields.get(relation, dict())
+            if not is_relational_field(infos.get('type')) or not infos.get('store'):
+                return None
+            model_name = infos['relation']
+        infos = (await self._env.load_model(model_name)).fields.get(field, dict())
+        return infos.get('type') if infos.get('store') else None
+
+
+class _AsyncAttribute:
+    """
+    What `records.attr` returns on an AsyncRecordSet, as we can't know if `attr` is a field before the model is loaded:
+        - awaited, it's the value of the field:     await record.name
+        - called, it's a call to a server method:   await records.action_post()
+    """
+
+    def __init__(self, records: AsyncRecordSet, name: str):
+        self._records = records
+        self._name = name
+
+    def __await__(self):
+        return self._records._get_field(self._name).__await__()
+
+    def __call__(self, *args, **kw):
+        return self._records._execute(self._name, *args, **kw)
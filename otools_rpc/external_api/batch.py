@@ -0,0 +1,218 @@
+from .utils import freeze, is_magic_number_list, split_every
+
+
+class BatchResult:
+    """
+    Placeholder returned by write(), create() and unlink() inside `env.batch()`
+    Its value is available once the batch is flushed:
+    >>> with env.batch():
+    >>>     partner = env['res.partner'].create({'name': 'Mitchell Admin'})
+    >>> partner.result()
+    >>> res.partner(42)
+    """
+
+    def __init__(self, description: str):
+        self._description = description
+        self._done = False
+        self._value = None
+        self._exception = None
+
+    def __str__(self):
+        state = f"= {self._value}" if self._done and not self._exception else "failed" if self._done else "pending"
+        return f"BatchResult({self._description} {state})"
+
+    __repr__ = __str__
+
+    @property
+    def done(self):
+        return self._done
+
+    def result(self):
+        if not self._done:
+            raise RuntimeError(f"{self._description} has not been sent yet, call env.flush() or leave env.batch() first")
+        if self._exception is not None:
+            raise self._exception
+        return self._value
+
+    def _resolve(self, value=None, exception: Exception = None):
+        self._done = True
+        self._value = value
+        self._exception = exception
+
+
+class Batch:
+    """
+    Queue of write(), create() and unlink() calls, sent with as few requests as possible when flushed:
+        - writes are merged per record, then records ending up with identical vals are written together
+        - creates on a same model are sent as one vals_list
+        - unlinks on a same model are sent together
+    Any other call to the server flushes the queue first, so the queued operations are always visible to it.
+    Queued writes are applied to the cache right away (write-behind), `dirty` tells which values are not sent yet.
+    If they are discarded or fail, these records are evicted from the cache:
+    >>> with env.batch() as batch:
+    >>>     for partner in partners:
+    >>>         partner.comment = 'Imported'        # Same as partner.write({'comment': 'Imported'})
+    >>>     batch.dirty
+    >>> {'res.partner': {7: {'comment': 'Imported'}, 8: {'comment': 'Imported'}}}
+    """
+
+    def __init__(self, env):
+        self._env = env
+        self.flushing = False
+
+        # Everything is grouped by (model, context)
+        self._contexts = dict()
+        self._writes = dict()       # key -> {res_id: merged vals}
+        self._creates = dict()      # key -> [(vals_list, BatchResult)]
+        self._unlinks = dict()      # key -> [(ids, BatchResult)]
+        self._write_results = list()
+
+    def __str__(self):
+        return f"Batch({self._env})"
+
+    def __len__(self):
+        return sum(map(len, self._writes.values())) + sum(map(len, self._creates.values())) + sum(map(len, self._unlinks.values()))
+
+    @property
+    def dirty(self) -> dict:
+        """ {model: {res_id: vals}} of the queued writes """
+        res = dict()
+        for (model, context), pending in self._writes.items():
+            for res_id, vals in pending.items():
+                res.setdefault(model, dict()).setdefault(res_id, dict()).update(vals)
+        return res
+
+    # --------------------------------------------
+    #                   PUBLIC
+    # --------------------------------------------
+
+
+    def write(self, records, vals: dict) -> BatchResult:
+        key = self._key(records)
+        if any(res_id in self._pending_unlinks(key) for res_id in records.ids):
+            self.flush()                # Keep the error of writing on deleted records
+
+        pending = self._writes.setdefault(key, dict())
+        for res_id in records.ids:
+            merged_vals = pending.setdefault(res_id, dict())
+            for field, value in vals.items():
+                if is_magic_number_list(value) and is_magic_number_list(merged_vals.get(field)):
+                    merged_vals[field] = merged_vals[field] + value       # Commands on x2many add up
+                else:
+                    merged_vals[field] = value
+        # x2many commands can't be applied locally (but (6, 0, ids)), these fields are dropped from the cache until read again
+        records._update_cache('write', True, vals, reread=False)
+
+        result = BatchResult(f"{records}.write()")
+        self._write_results.append(result)
+        return result
+
+    def create(self, model, vals_list: list[dict]) -> BatchResult:
+        result = BatchResult(f"{model._name}.create()")
+        self._creates.setdefault(self._key(model), list()).append((vals_list, result))
+        return result
+
+    def unlink(self, records) -> BatchResult:
+        key = self._key(records)
+        for res_id in records.ids:
+            self._writes.get(key, dict()).pop(res_id, None)     # No need to write on records about to be deleted
+
+        result = BatchResult(f"{records}.unlink()")
+        self._unlinks.setdefault(key, list()).append((records.ids, result))
+        return result
+
+    def discard(self):
+        """ Drop the queued operations, the records having queued writes are evicted from the cache """
+        writes = self._writes
+        self._writes, self._creates, self._unlinks, self._write_results = dict(), dict(), dict(), list()
+        self._forget(writes)
+
+    def flush(self):
+        """ Send every queued operation: creates first, then writes and finally unlinks """
+        if self.flushing or not len(self):
+            return
+
+        self._env.logger.debug(f"Flushing {len(self)} queued operations of {self}")
+        self.flushing = True
+        try:
+            self._flush_creates()
+            self._flush_writes()
+            self._flush_unlinks()
+        finally:
+            self.flushing = False
+
+    # --------------------------------------------
+    #                   PRIVATE
+    # --------------------------------------------
+
+
+    def _key(self, records) -> tuple:
+        key = (records._name, freeze(dict(records.context)))
+        self._contexts[key] = records.context
+        return key
+
+    def _model(self, key: tuple):
+        return self._env[key[0]].with_context(**self._contexts[key])
+
+    def _pending_unlinks(self, key: tuple) -> set:
+        return {res_id for ids, result in self._unlinks.get(key, list()) for res_id in ids}
+
+    def _flush_creates(self):
+        creates, self._creates = self._creates, dict()
+        for key, queued in creates.items():
+            try:
+                records = self._model(key).browse([])
+                for vals_list in split_every(self._env.chunk_size, [vals for vals_list, result in queued for vals in vals_list]):
+                    records |= self._model(key).create(vals_list)
+            except Exception as e:
+                for vals_list, result in queued:
+                    result._resolve(exception=e)
+                raise
+
+            start = 0
+            for vals_list, result in queued:
+                result._resolve(records[start:start + len(vals_list)])
+                start += len(vals_list)
+
+    def _flush_writes(self):
+        writes, self._writes = self._writes, dict()
+        write_results, self._write_results = self._write_results, list()
+        for key, pending in writes.items():
+            groups = dict()     # frozen vals -> (vals, ids)
+            for res_id, vals in pending.items():
+                groups.setdefault(freeze(vals), (vals, list()))[1].append(res_id)
+
+            for vals, ids in groups.values():
+                try:
+                    self._model(key).browse(ids).write(vals)
+                except Exception as e:
+                    for result in write_results:
+                        result._resolve(exception=e)
+                    self._forget(writes)
+                    raise
+
+        for result in write_results:
+            result._resolve(True)
+
+    def _forget(self, writes: dict):
+        """ Evict the records of `writes`: their cached values may never have reached the server """
+        if not self._env.cache_enabled:
+            return
+        for (model, context), pending in writes.items():
+            model_cache = self._env.cache[model]
+            for res_id in pending:
+                if res_id in model_cache:
+                    del model_cache[res_id]
+
+    def _flush_unlinks(self):
+        unlinks, self._unlinks = self._unlinks, dict()
+        for key, queued in unlinks.items():
+            try:
+                res = self._model(key).browse([res_id for ids, result in queued for res_id in ids]).unlink()
+            except Exception as e:
+                for ids, result in queued:
+                    result._resolve(exception=e)
+                raise
+
+            for ids, result in queued:
+                result._resolve(res)
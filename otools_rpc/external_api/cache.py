@@ -1,9 +1,18 @@
-from datetime import datetime, timedelta
-from typing import Union
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Union
+from .cache_backends import MemoryBackend
+from .metadata import FIELDS_ATTRIBUTES, MODULES_DOMAIN, MODULES_FIELDS, FieldsFile
 from .recordset import RecordSet
 from .common import frozendict
+from .query_cache import _MISSING
 from .utils import is_magic_number_list, is_relational_field
 
+SYNC_CLOCK_MARGIN = 60      # Seconds the clock of the server may be behind ours, see Cache._start_sync()
+
+
+
 
 class Cache(dict):
     """
@@ -16,6 +25,23 @@ class Cache(dict):
     def __init__(self, env):
         super().__init__()
         self._env = env
+        self.backend = env.cache_backend or MemoryBackend()
+        self.fields_file = FieldsFile(env.cache_fields_path, f"{env._url}|{env._db}") if env.cache_fields_path else None
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()         # Records counting and eviction, storages have their own locks
+        self._poll_lock = threading.Lock()
+        self._last_poll = time.monotonic()
+        self._sync = dict()         # model -> last write_date seen on the server
+        self.records_count = 0
+        self.stats = {
+            'evictions': 0,     # Records dropped to respect cache_max_records / cache_max_total_records
+            'expired': 0,       # Records dropped by sweep() because all their values expired
+            'served': 0,        # Values returned by read(use_cache=True) without asking the server
+            'fetched': 0,       # Values read(use_cache=True) had to fetch
+            'hits': 0,          # Fresh values found by dotted notation (record.field)
+            'misses': 0,        # Expired or missing values dotted notation had to read
+            'invalidated': 0,   # Records evicted or read again because they changed on the server
+        }
 
         if self.is_enabled and self.default_expiration < 5:
             self._env.logger.warning(f"The default expiration of your cache is {self.default_expiration} seconds, it is not recommended to use such a low value.")
@@ -26,13 +52,18 @@ class Cache(dict):
     def __missing__(self, key: str):
         if not isinstance(key, str):
             raise TypeError(f"Cache key must be a string, not {type(key)} ({key})")
-        self[key] = CacheModel(self, key)
-        return self[key]
+        # Fields are fetched outside of any lock, if two threads do it at the same time, the first one wins
+        return self.setdefault(key, CacheModel(self, key))
 
     @property
     def env(self):
         return self._env
 
+    @property
+    def namespace(self):
+        """ Values are specific to a database and a user, this tells them apart in shared backends """
+        return f"{self._env._url}|{self._env._db}|{self._env.user and self._env.uid}"
+
     @property
     def is_enabled(self):
         return self._env.cache_enabled
@@ -41,29 +72,218 @@ class Cache(dict):
     def default_expiration(self):
         return self._env.cache_expiration
 
+    @property
+    def poll_due(self):
+        """ True if `cache_invalidation_interval` seconds elapsed since the last poll_changes() """
+        interval = self._env.cache_invalidation_interval
+        return bool(interval) and self.is_enabled and time.monotonic() - self._last_poll > interval
+
+    @property
+    def prefetch_max(self):
+        """ Never prefetch more records than the cache can hold, they would evict each other. None: no limit """
+        limits = [self._env.cache_prefetch_max, self._env.cache_max_records, self._env.cache_max_total_records]
+        return min((limit for limit in limits if limit), default=None)
+
+
+    def get_fields(self, model: str) -> dict:
+        """
+        Fields metadata of `model`, from the backend or the fields file if they have it, otherwise from the server
+        Only the attributes used by the library are asked (see metadata.FIELDS_ATTRIBUTES)
+        """
+        if self.fields_file and not self.fields_file.loaded:
+            self.fields_file.load(self._env['ir.module.module']._execute('search_read', MODULES_DOMAIN, MODULES_FIELDS))
+
+        fields = self.stored_fields(model)
+        if fields is None:
+            fields = self._env[model].fields_get(attributes=FIELDS_ATTRIBUTES)
+            self.store_fields(model, fields)
+        return fields
+
+    def stored_fields(self, model: str) -> dict:
+        """ Fields metadata of `model` known without calling the server, or None """
+        fields = self.backend.get_fields(self, model)
+        if fields is None and self.fields_file:
+            fields = self.fields_file.get(model)
+        return fields
+
+    def store_fields(self, model: str, fields: dict):
+        self.backend.set_fields(self, model, fields)
+        if self.fields_file:
+            self.fields_file.set(model, fields)
+
+    def sweep(self) -> int:
+        """ Drop records whose values are all expired, return the number of dropped records """
+        now = time.time()
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            dropped = 0
+            for model_cache in list(self.values()):
+                for res_id in model_cache.storage.expired_ids(now):
+                    del model_cache[res_id]
+                    dropped += 1
+            self.stats['expired'] += dropped
+        return dropped
+
+    def poll_changes(self) -> int:
+        """
+        Invalidate the cached records modified on the server since the last poll, so long expirations are safe to use
+        Each model having cached records costs one search_read on write_date, the first one looks from the moment its
+        first values were cached
+        Called every `cache_invalidation_interval` seconds when the cache is used, return the number of invalidated records
+        Deleted records can't be seen this way, they are dropped from the cache when read
+        """
+        if not self._poll_lock.acquire(blocking=False):
+            return 0        # Another thread is polling
+        try:
+            count = 0
+            for model_cache, domain, kw in self._poll_requests():
+                rows = self._env[model_cache.name]._execute('search_read', domain, **kw)
+                count += self.invalidate(model_cache.name, self._poll_result(model_cache, rows))
+            return count
+        finally:
+            self._poll_lock.release()
+
+    def invalidate(self, model: str, res_ids: list[int]) -> int:
+        """
+        Evict the records `res_ids` of `model`, or read them again with `cache_invalidation_refresh`
+        Plug any change feed (bus, webhooks...) here: env.cache.invalidate('res.partner', [7, 12])
+        Return the number of records that were in the cache
+        """
+        res_ids, fields = self._invalidate(model, res_ids)
+        if fields:
+            self._env[model].browse(res_ids).read(fields)
+        return len(res_ids)
+
+    def _on_record_added(self, model_cache: "CacheModel"):
+        """
+        Called each time a record is added to a model: evict the least recently used records if limits are reached
+        Expired records are swept from time to time too (every `cache_sweep_interval` seconds at most)
+        """
+        with self._lock:
+            self.records_count += 1
+            if self._env.cache_sweep_interval and time.monotonic() - self._last_sweep > self._env.cache_sweep_interval:
+                self.sweep()
 
-class CacheModel(dict):
+            max_records = self._env.cache_max_records
+            while max_records and len(model_cache) > max_records:
+                self._evict(model_cache)
+
+            max_total_records = self._env.cache_max_total_records
+            while max_total_records and self.records_count > max_total_records:
+                # The global LRU record is the oldest of the LRU records of each model
+                self._evict(min((m for m in list(self.values()) if len(m)), key=lambda m: m.storage.last_access(m.storage.lru())))
+
+    def _on_record_removed(self, model_cache: "CacheModel"):
+        with self._lock:
+            self.records_count -= 1
+
+    def _start_sync(self, model_cache: "CacheModel", rows: list[dict]):
+        """
+        Starting point of poll_changes() for a model, set when its first values are cached: changes made after that are
+        invalidated by the first poll. It's the current time (UTC like write_date, minus SYNC_CLOCK_MARGIN), or the newest
+        write_date of the rows read if the server is ahead
+        """
+        if not self._env.cache_invalidation_interval or self._sync.get(model_cache.name) is not None or not model_cache.field_exists('write_date'):
+            return
+        start = (datetime.now(timezone.utc) - timedelta(seconds=SYNC_CLOCK_MARGIN)).strftime('%Y-%m-%d %H:%M:%S')
+        newest = max((row['write_date'] for row in rows if row.get('write_date')), default=None)
+        self._sync[model_cache.name] = newest if newest and newest > start else start
+
+    def _poll_requests(self) -> list[tuple["CacheModel", list, dict]]:
+        """ (model cache, domain, search_read kwargs) of the models poll_changes() has to check """
+        self._last_poll = time.monotonic()
+        requests = list()
+        for model_cache in list(self.values()):
+            if not model_cache.field_exists('write_date') or not len(model_cache):
+                continue
+            kw = {'fields': ['write_date'], 'context': {'active_test': False}}
+            last_sync = self._sync.get(model_cache.name)
+            if last_sync is None:
+                requests.append((model_cache, [], dict(kw, order='write_date desc', limit=1)))
+            else:
+                # write_date has a precision of 1 second: `>=` to see the records written later in the same second as
+                # the last one seen. The records of that second may have changed again without a new write_date, they
+                # are invalidated by each poll until a newer write (only a few records)
+                requests.append((model_cache, [('write_date', '>=', last_sync)], dict(kw, order='write_date')))
+        return requests
+
+    def _poll_result(self, model_cache: "CacheModel", rows: list[dict]) -> list[int]:
+        """ Remember where the poll stopped, return the ids of the changed records """
+        if self._sync.get(model_cache.name) is None:
+            self._sync[model_cache.name] = rows[0]['write_date'] if rows else None
+            return []
+        if rows:
+            self._sync[model_cache.name] = max(row['write_date'] for row in rows)
+        changed = [row['id'] for row in rows]
+        if changed:
+            self._env.query_cache.invalidate()     # Searches may not give the same records anymore
+        return changed
+
+    def _invalidate(self, model: str, res_ids: list[int]) -> tuple[list[int], list[str]]:
+        """ Evict the cached records of `res_ids`, or return (their ids, their cached fields) to read them again """
+        model_cache = self[model]
+        res_ids = [res_id for res_id in res_ids if res_id in model_cache]
+        self.stats['invalidated'] += len(res_ids)
+        if not res_ids:
+            return res_ids, []
+        if self._env.cache_invalidation_refresh:
+            fields = [field for field in model_cache.fields if field != 'id' and any(field in model_cache[res_id] for res_id in res_ids)]
+            if fields:
+                return res_ids, fields
+        for res_id in res_ids:
+            del model_cache[res_id]
+        return res_ids, []
+
+    def _evict(self, model_cache: "CacheModel"):
+        del model_cache[model_cache.storage.lru()]
+        self.stats['evictions'] += 1
+
+
+class CacheModel:
     """
     Basically a dict of CacheRecord
     Allows to perform operations on model level with dict notation. Ex:
     >>> cache = Cache(env)
     >>> cache_record_7 = cache['res.partner'][7]    # Return a CacheRecord of res.partner(7)
+    Values are not stored in CacheRecord/CacheField objects (they are only views), but in the storage given by the
+    backend of the cache (by default a ColumnStorage, in memory)
     """
 
-    def __init__(self, cache: "Cache", name: str):
-        super().__init__()
+    def __init__(self, cache: "Cache", name: str, fields: dict = None):
         self._name = name
         self._cache = cache
-        self._fields = cache.env[name].fields_get()
+        self._fields = fields if fields is not None else cache.get_fields(name)
+        self._storage = cache.backend.storage(cache, name)
 
     def __str__(self):
         return f"CacheModel({self._name})"
 
-    def __missing__(self, key: int):
+    def __getitem__(self, key: int):
         if not isinstance(key, int):
             raise TypeError(f"Record id must be an int, not {type(key)} ({key} on model {self.name})")
-        self[key] = CacheRecord(self, key)
-        return self[key]
+        return CacheRecord(self, key)
+
+    def __contains__(self, key: int):
+        return key in self._storage
+
+    def __delitem__(self, key: int):
+        if self._storage.discard(key):
+            self._cache._on_record_removed(self)
+
+    def __iter__(self):
+        return iter(self._storage)
+
+    def __len__(self):
+        return len(self._storage)
+
+    def keys(self) -> list[int]:
+        return list(self._storage)
+
+    def values(self) -> list["CacheRecord"]:
+        return [self[res_id] for res_id in self.keys()]
+
+    def items(self) -> list[tuple[int, "CacheRecord"]]:
+        return [(res_id, self[res_id]) for res_id in self.keys()]
 
     @property
     def api(self):
@@ -81,19 +301,30 @@ class CacheModel(dict):
     def fields(self):
         return self._fields
 
+    @property
+    def storage(self):
+        return self._storage
+
     def field_exists(self, field: str):
         return field in self._fields
 
+    def store(self, res_id: int, field: str, value: Any, expiration: float):
+        """ Store a raw value in the storage, used by CacheField.set() """
+        if self._storage.set(res_id, field, value, expiration):
+            self._cache._on_record_added(self)
+
     def cache_expired(self, field: str, res_ids: list[int]):
-        return not self.cache.is_enabled or any(self[res_id][field].is_expired for res_id in res_ids)
+        now = time.time()
+        return not self.cache.is_enabled or any(self._storage.expiration(res_id, field) <= now for res_id in res_ids)
 
 
-    def get(self, res_ids: Union[int, list[int]], field: str, context: frozendict = None):
+    def get(self, res_ids: Union[int, list[int]], field: str, context: frozendict = None, prefetch_ids: list[int] = None):
         """
         Get a list of records from the cache
         If the records are not in the cache, they are fetched from the API and stored in the cache
+        A single record coming from a bigger recordset (see `prefetch_ids`) is fetched along with its siblings
         """
-        if not isinstance(res_ids, list):
+        if isinstance(res_ids, int):
             res_ids = [res_ids]
 
         if not self.cache.is_enabled:
@@ -102,55 +333,183 @@ class CacheModel(dict):
             raise EnvironmentError("You must activate cache to use dotted notation")
 
         if len(res_ids) == 1:
+            if prefetch_ids and len(prefetch_ids) > 1 and self.is_expired(res_ids[0], field):
+                self.cache.stats['misses'] += 1
+                self.prefetch(field, res_ids[0], prefetch_ids, context=context)
+                value, expiration = self._storage.lookup(res_ids[0], field)
+                if expiration > time.time():
+                    return self[res_ids[0]][field]._convert(value)
             return self[res_ids[0]][field].get()
         else:
             recordset = self.api.with_context(**context).browse(res_ids)
             return recordset.mapped(field)
 
 
-    def update(self, op, records, res, *args, **kwargs):
+    def raw_values(self, res_ids: list[int], field: str, rows: list[dict] = None) -> list:
+        """
+        Stored values of `field` (ids for relations) for each of `res_ids`
+        Expired (or evicted) ones are taken from `rows` as read() returned them, _MISSING if they are not there either
         """
-        `Main method` that is used by any method prefixed with @cache in RecordSet class
+        now = time.time()
+        fetched = {row['id']: row.get(field) for row in rows or ()}
+        res, misses = list(), 0
+        for res_id in res_ids:
+            value, expiration = self._storage.lookup(res_id, field)
+            if expiration <= now:
+                misses += 1
+                value = self._raw_value(field, fetched[res_id]) if res_id in fetched else _MISSING
+            res.append(value)
+        self._cache.stats['hits'] += len(res) - misses
+        self._cache.stats['misses'] += misses
+        return res
+
+    def prefetch(self, field: str, res_id: int, prefetch_ids: list[int], context: frozendict = None):
+        """ Read `field` in one call for `res_id` and its expired siblings """
+        res_ids = self.prefetch_candidates(field, res_id, prefetch_ids)
+        self.api.with_context(**(context or dict())).browse(res_ids).read(self._prefetch_fields(field))
+
+    def prefetch_candidates(self, field: str, res_id: int, prefetch_ids: list[int]) -> list[int]:
+        """
+        Return up to `cache.prefetch_max` expired records of `prefetch_ids`, starting at `res_id`
+        Records before `res_id` are most likely already fetched when iterating, so we don't even look at them
+        """
+        try:
+            candidates = prefetch_ids[prefetch_ids.index(res_id):]
+        except ValueError:
+            candidates = [res_id]
+
+        res_ids, prefetch_max = list(), self.cache.prefetch_max
+        for candidate_id in candidates:
+            if self.is_expired(candidate_id, field):
+                res_ids.append(candidate_id)
+                if prefetch_max and len(res_ids) >= prefetch_max:
+                    break
+        return res_ids
+
+    def read_plan(self, res_ids: list[int], fields: list[str]) -> tuple[dict, list[tuple[list[int], list[str]]]]:
+        """
+        Split a read of `fields` on `res_ids` between the values the cache can serve and the ones to fetch
+        Return ({res_id: {field: value in read() format}}, [(ids, fields to fetch)]): ids missing the same fields are
+        fetched together, and all of them in a single read if it doesn't fetch more than twice the missing values
+        """
+        fields = [field for field in fields if field != 'id']
+        cached, groups = dict(), dict()
+        for res_id in res_ids:
+            cached[res_id] = {'id': res_id}
+            missing = list()
+            for field in fields:
+                value = self._read_value(res_id, field)
+                if value is _MISSING:
+                    missing.append(field)
+                else:
+                    cached[res_id][field] = value
+            if missing:
+                groups.setdefault(tuple(missing), list()).append(res_id)
+
+        missing_count = sum(len(missing) * len(ids) for missing, ids in groups.items())
+        self._cache.stats['served'] += len(res_ids) * len(fields) - missing_count
+        self._cache.stats['fetched'] += missing_count
+        if len(groups) > 1:
+            all_ids = [res_id for ids in groups.values() for res_id in ids]
+            all_fields = list({field: None for missing in groups for field in missing})
+            if len(all_ids) * len(all_fields) <= 2 * missing_count:
+                return cached, [(all_ids, all_fields)]
+        return cached, [(ids, list(missing)) for missing, ids in groups.items()]
+
+    def is_expired(self, res_id: int, field: str) -> bool:
+        """ Same as self[res_id][field].is_expired, without creating the views """
+        return self._storage.expiration(res_id, field) <= time.time()
+
+    def update(self, op, records, res, *args, reread: bool = True, **kwargs):
+        """
+        `Main method`, called by RecordSet._update_cache() after each create(), write(), unlink() and read()
         Depending on the operation, res is different:
         - create:   res is a RecordSet
         - write:    res is a boolean
         - delete:   res is a boolean
         - read:     res is a list of dicts
+        x2many given as commands can't be cached from the vals (but a single (6, 0, ids)), they are read again, or
+        dropped from the cache if `reread` is False
         """
         fields_to_read_post_update = list()
 
-        if op == 'create':
-            records = res       # Do not remove, so we can keep only 1 read statement at the end
-            vals_list = [args[0]] if isinstance(args[0], dict) else args[0]
-            for record, vals in zip(records, vals_list):
-                fields_to_read_post_update += self._sanitize_vals(vals)
-                self[record.id] = CacheRecord(self, record['id'])
-                self[record.id].update(vals)
-
-        elif op == 'write' and res:
-            vals = args[0]
-            for record in records:
-                fields_to_read_post_update += self._sanitize_vals(vals)
-                self[record.id].update(vals)
-
-        elif op == 'delete':
-            for record in records:
-                if record.id in self:
+        with self._storage.transaction():     # One transaction for the whole result with shared backends
+            if op == 'create':
+                records = res       # Do not remove, so we can keep only 1 read statement at the end
+                vals_list = [args[0]] if isinstance(args[0], dict) else args[0]
+                for record, vals in zip(records, vals_list):
+                    vals = dict(vals)
+                    fields_to_read_post_update += self._sanitize_vals(vals)
                     del self[record.id]
+                    self[record.id].update(vals)
 
-        elif op == 'read':
-            for rec_dict in res:
-                res_id = rec_dict.pop('id')
-                self[res_id].update(rec_dict)
-
-
-        if fields_to_read_post_update:
-            records.read(list(set(fields_to_read_post_update)))
-
-
+            elif op == 'write' and res:
+                vals = dict(args[0])        # Sanitizing must not alter the vals sent to the server (chunked writes)
+                fields_to_read_post_update += self._sanitize_vals(vals)
+                for record in records:
+                    self[record.id].update(vals)
+                    if not reread and record.id in self:
+                        # Not read again: drop the previous value, it would be served as fresh
+                        for field in fields_to_read_post_update:
+                            self.store(record.id, field, None, 0)
+
+            elif op == 'delete':
+                for record in records:
+                    if record.id in self:
+                        del self[record.id]
+
+            elif op == 'read':
+                for rec_dict in res:
+                    self[rec_dict['id']].update({k: v for k, v in rec_dict.items() if k != 'id'})
+
+        if op != 'delete':
+            self._cache._start_sync(self, res if op == 'read' else [])
+
+        if fields_to_read_post_update and reread:
+            return records.read(list(set(fields_to_read_post_update)))
+
+
+
+    def _read_value(self, res_id: int, field: str) -> Any:
+        """ Fresh value of the field as read() returns it, or _MISSING """
+        if not self.field_exists(field) or self.is_expired(res_id, field):
+            return _MISSING
+
+        value = self._storage.value(res_id, field)
+        field_type = self._fields[field]['type']
+        if field_type == 'many2one' and value:
+            # read() returns (id, name), we need the name of the comodel record too
+            comodel_cache = self._cache[self._fields[field]['relation']]
+            if not comodel_cache.field_exists('name') or comodel_cache.storage.expiration(value, 'name') <= 0:
+                return _MISSING
+            return [value, comodel_cache.storage.value(value, 'name')]
+        elif field_type in ['one2many', 'many2many']:
+            return list(value or [])
+        return value
+
+    def _raw_value(self, field: str, value: Any) -> Any:
+        """ Value of `field` as read() returns it, in the stored form (ids for relations) """
+        field_type = self._fields.get(field, dict()).get('type')
+        if field_type == 'many2one':
+            return value[0] if isinstance(value, (tuple, list)) else (value or False)
+        elif field_type in ['one2many', 'many2many']:
+            return tuple(value or ())
+        return value
+
+    def _prefetch_fields(self, field: str) -> list[str]:
+        """ Fields read along with `field` when prefetching: only `field`, or every cheap stored field like Odoo does """
+        if not self.cache.env.cache_prefetch_fields:
+            return [field]
+        return list({field} | {
+            name for name, infos in self._fields.items()
+            if infos.get('store') and infos.get('type') not in ['one2many', 'many2many', 'binary']
+        })
 
     def _sanitize_vals(self, vals: dict) -> list:
-        """ Remove keys that are magic numbers and return them as a list of fields names """
+        """
+        Remove keys that are magic numbers and return them as a list of fields names
+        A single (6, 0, ids) gives the new value, it's replaced by `ids` instead
+        """
         fields_to_remove = list()
         for k, v in vals.items():
             if (
@@ -158,7 +517,10 @@ class CacheModel(dict):
                 and self._fields[k]['type'] in ['one2many', 'many2many']
                 and is_magic_number_list(v)
             ):
-                fields_to_remove.append(k)
+                if len(v) == 1 and v[0][0] == 6:
+                    vals[k] = list(v[0][2])
+                else:
+                    fields_to_remove.append(k)
 
         for k in fields_to_remove:
             vals.pop(k)
@@ -166,26 +528,50 @@ class CacheModel(dict):
         return fields_to_remove
 
 
-class CacheRecord(dict):
+class CacheRecord:
+    """ View on the cached values of one record, behaves like a dict of CacheField """
+    __slots__ = ('_model', '_id')
+
     def __init__(self, model: "CacheModel", res_id: int):
-        super().__init__()
         self._model = model
-        self._env_record = model.api.browse(res_id)
+        self._id = res_id
 
     def __str__(self):
-        return f"CacheRecord({self._env_record})"
+        return f"CacheRecord({self._model.name}({self._id}))"
 
-    def __missing__(self, key: str):
+    def __getitem__(self, key: str):
         key = str(key)
         if not self._model.field_exists(key):
             raise KeyError(f"Field {key} does not exist on model {self._model.name}")
+        return CacheField(self, key)
+
+    def __contains__(self, key: str):
+        """ True if a value (even expired) is stored for field `key` """
+        return self._model.storage.expiration(self._id, key) > 0
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self) -> list[str]:
+        """ Fields having a stored value (even expired) """
+        return [field for field in self._model.fields if field in self]
 
-        self[key] = CacheField(self, key)
-        return self[key]
+    def values(self) -> list["CacheField"]:
+        return [self[field] for field in self.keys()]
+
+    def items(self) -> list[tuple[str, "CacheField"]]:
+        return [(field, self[field]) for field in self.keys()]
+
+    @property
+    def id(self):
+        return self._id
 
     @property
     def env_record(self):
-        return self._env_record
+        return self._model.api.browse(self._id)
 
     @property
     def model(self):
@@ -203,21 +589,25 @@ class CacheRecord(dict):
 
 
 class CacheField:
+    """ View on the cached value of one field of a record, see cache_backends for the actual storage """
+    __slots__ = ('_record', 'name')
 
-    def __init__(self, record: "CacheRecord", name: str, validity_duration: int = None):
+    def __init__(self, record: "CacheRecord", name: str):
         self._record = record
-        self._value = None
         self.name = name
-        self.validity_duration = validity_duration
-        self.expiration = None
 
     def __str__(self):
-        return f"{self._value}"
+        return f"{self._record.model.storage.value(self._record.id, self.name)}"
+
 
+    @property
+    def expiration(self):
+        """ Expiration timestamp (time.time() based), None if no value is stored """
+        return self._record.model.storage.expiration(self._record.id, self.name) or None
 
     @property
     def is_expired(self):
-        return self.expiration is None or (datetime.utcnow() > self.expiration)
+        return self._record.model.storage.expiration(self._record.id, self.name) <= time.time()
 
     @property
     def infos(self):
@@ -236,46 +626,56 @@ class CacheField:
 
 
     def get(self):
-        if self.is_expired:
-            self._read()
-        return self._value
+        value, expiration = self._record.model.storage.lookup(self._record.id, self.name)
+        stats = self._record.model.cache.stats
+        if expiration <= time.time():
+            stats['misses'] += 1
+            return self._convert(self._read())      # Not from the storage, another thread may have evicted it already
+        stats['hits'] += 1
+        return self._convert(value)
+
+    def value(self):
+        """ The stored value, expired or not """
+        return self._convert(self._record.model.storage.value(self._record.id, self.name))
+
+    def _convert(self, value):
+        if self.is_relational:
+            # Relations are stored as ids (an int or False for many2one, a tuple for x2many)
+            value = self._record.model.cache.env[self.infos['relation']].browse(value or ())
+        return value
 
-    def set(self, value):
+    def set(self, value, validity_duration: int = None):
         """
         Set the value of the field with smart resolvers
         This saves the value in the cache and set the expiration date also
-            All relations: set it as a RecordSet to manipulate the field easily
+            All relations: save the ids only, get() returns a RecordSet to manipulate the field easily
             Many2one: save the name of the record (returned by API by default)
             One2many: save the inverse relation (the m2o) if it exists
         """
         if self.is_relational:
-            comodel_name = self.infos['relation']
-            res_id = value
-
-
-            if res_id is False:
-                res_id = []
-            elif self.type == 'many2one' and isinstance(value, (tuple, list)):
-                res_id = value[0]
-                self._record.model.cache[comodel_name][res_id]['name'].set(value[1])
-            elif self.type == 'one2many' and 'relation_field' in self.infos:
-                relation_field = self.infos['relation_field']
-                for i in res_id:
-                    self._record.model.cache[comodel_name][i][relation_field].set(self._record.env_record.id)
+            comodel_cache = self._record.model.cache[self.infos['relation']]
 
             if isinstance(value, RecordSet):
-                res_id = value.ids
-            value = self._record.model.cache.env[comodel_name].browse(res_id)
-
-        self._value = value
-        self._set_expiration()
+                res_ids = value._ids
+            elif value is False or value is None:
+                res_ids = []
+            elif self.type == 'many2one' and isinstance(value, (tuple, list)):
+                res_ids = [value[0]]
+                if comodel_cache.field_exists('name'):
+                    comodel_cache[value[0]]['name'].set(value[1])
+            else:
+                res_ids = [value] if isinstance(value, int) else list(value)
 
+            if self.type == 'one2many' and 'relation_field' in self.infos:
+                for res_id in res_ids:
+                    comodel_cache[res_id][self.infos['relation_field']].set(self._record.id)
 
-    def _read(self):
-        self.set(self._record.env_record.read([self.name])[0].get(self.name))
+            value = (res_ids[0] if res_ids else False) if self.type == 'many2one' else tuple(res_ids)
 
-    def _set_expiration(self):
-        validity_duration = self.validity_duration or self._record.model.cache.default_expiration
-        self.expiration = datetime.utcnow() + timedelta(seconds=validity_duration)
+        validity_duration = validity_duration or self._record.model.cache.default_expiration
+        self._record.model.store(self._record.id, self.name, value, time.time() + validity_duration)
+        return value
 
 
+    def _read(self):
+        return self.set(self._record.env_record.read([self.name])[0].get(self.name))
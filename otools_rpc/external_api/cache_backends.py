@@ -0,0 +1,283 @@
+import json
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager, nullcontext
+from typing import Any
+
+
+class CacheBackend:
+    """
+    Where the cache stores its values: each CacheModel gets its storage from `backend.storage()`
+    A storage holds the raw values of one model and their expiration timestamps, see ColumnStorage for the interface.
+    Backends can also share the fields metadata (fields_get) of models.
+    """
+
+    def storage(self, cache, model: str):
+        raise NotImplementedError()
+
+    def get_fields(self, cache, model: str) -> dict:
+        """ Return the fields metadata of `model` if the backend has it """
+        return None
+
+    def set_fields(self, cache, model: str, fields: dict):
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """ Default backend: values are stored in memory, by column, and private to the environment """
+
+    def __str__(self):
+        return "MemoryBackend()"
+
+    def storage(self, cache, model: str):
+        return ColumnStorage()
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Values are stored in a local SQLite file, so several processes on the same host (ex: gunicorn workers) share them
+    as well as fields metadata. Values are namespaced by url, database and user, and keep their expiration timestamp.
+    >>> env = Environment(url, username, password, db=db, cache_backend=SQLiteBackend('/tmp/odoo_cache.sqlite'))
+    Reading a value costs a query on the file instead of a dict lookup: it's worth it when values are shared and
+    expensive to fetch. LRU limits (cache_max_records...) don't apply, expired values are still swept.
+    """
+
+    def __init__(self, path: str, timeout: float = 30, fields_expiration: int = 3600):
+        self.path = path
+        self.timeout = timeout
+        self.fields_expiration = fields_expiration
+        self._local = threading.local()         # sqlite3 connections can't be shared between threads
+        self._execute('''
+            CREATE TABLE IF NOT EXISTS cache_values (
+                namespace TEXT, model TEXT, res_id INTEGER, field TEXT, value TEXT, expiration REAL, access REAL,
+                PRIMARY KEY (namespace, model, res_id, field)
+            ) WITHOUT ROWID
+        ''')
+        self._execute('''
+            CREATE TABLE IF NOT EXISTS cache_fields (
+                namespace TEXT, model TEXT, fields TEXT, expiration REAL,
+                PRIMARY KEY (namespace, model)
+            ) WITHOUT ROWID
+        ''')
+
+    def __str__(self):
+        return f"SQLiteBackend({self.path})"
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if getattr(self._local, 'connection', None) is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return self._local.connection
+
+    def storage(self, cache, model: str):
+        return SQLiteStorage(self, cache.namespace, model)
+
+    def get_fields(self, cache, model: str) -> dict:
+        row = self._execute(
+            'SELECT fields FROM cache_fields WHERE namespace = ? AND model = ? AND expiration > ?',
+            (cache.namespace, model, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_fields(self, cache, model: str, fields: dict):
+        self._execute(
+            'INSERT OR REPLACE INTO cache_fields VALUES (?, ?, ?, ?)',
+            (cache.namespace, model, json.dumps(fields), time.time() + self.fields_expiration),
+        )
+
+    def _execute(self, query: str, params: tuple = ()) -> sqlite3.Cursor:
+        return self.connection.execute(query, params)
+
+
+class SQLiteStorage:
+    """ Same interface as ColumnStorage, for the values of one model in a SQLiteBackend """
+
+    def __init__(self, backend: SQLiteBackend, namespace: str, model: str):
+        self._backend = backend
+        self._key = (namespace, model)
+
+    def __contains__(self, res_id: int):
+        return self._fetch('SELECT 1 FROM cache_values WHERE namespace = ? AND model = ? AND res_id = ? LIMIT 1', res_id) is not None
+
+    def __iter__(self):
+        rows = self._backend._execute('SELECT DISTINCT res_id FROM cache_values WHERE namespace = ? AND model = ?', self._key)
+        return iter([res_id for res_id, in rows.fetchall()])
+
+    def __len__(self):
+        return self._fetch('SELECT COUNT(DISTINCT res_id) FROM cache_values WHERE namespace = ? AND model = ?')[0]
+
+    @contextmanager
+    def transaction(self):
+        """ Group many writes (ex: the result of a read) in one transaction, way faster than one per value """
+        connection = self._backend.connection
+        if connection.in_transaction:
+            yield
+            return
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def expiration(self, res_id: int, field: str) -> float:
+        row = self._fetch('SELECT expiration FROM cache_values WHERE namespace = ? AND model = ? AND res_id = ? AND field = ?', res_id, field)
+        return row[0] if row else 0.0
+
+    def value(self, res_id: int, field: str) -> Any:
+        return self.lookup(res_id, field)[0]
+
+    def lookup(self, res_id: int, field: str) -> tuple[Any, float]:
+        row = self._fetch('SELECT value, expiration FROM cache_values WHERE namespace = ? AND model = ? AND res_id = ? AND field = ?', res_id, field)
+        return (json.loads(row[0]), row[1]) if row else (None, 0.0)
+
+    def set(self, res_id: int, field: str, value: Any, expiration: float) -> bool:
+        """ Store the value. Records are shared between processes, so they are never reported as new (no LRU limits) """
+        self._backend._execute(
+            'INSERT OR REPLACE INTO cache_values VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (*self._key, res_id, field, json.dumps(value, default=str), expiration, time.time()),
+        )
+        return False
+
+    def discard(self, res_id: int) -> bool:
+        """ Drop the values of the record. Like set(), never reported to the cache as it doesn't count shared records """
+        self._backend._execute('DELETE FROM cache_values WHERE namespace = ? AND model = ? AND res_id = ?', (*self._key, res_id))
+        return False
+
+    def lru(self) -> int:
+        return self._fetch('SELECT res_id FROM cache_values WHERE namespace = ? AND model = ? GROUP BY res_id ORDER BY MAX(access) LIMIT 1')[0]
+
+    def last_access(self, res_id: int) -> float:
+        return self._fetch('SELECT MAX(access) FROM cache_values WHERE namespace = ? AND model = ? AND res_id = ?', res_id)[0]
+
+    def expired_ids(self, now: float) -> list[int]:
+        rows = self._backend._execute(
+            'SELECT res_id FROM cache_values WHERE namespace = ? AND model = ? GROUP BY res_id HAVING MAX(expiration) <= ?',
+            (*self._key, now),
+        )
+        return [res_id for res_id, in rows.fetchall()]
+
+    def _fetch(self, query: str, *params) -> tuple:
+        return self._backend._execute(query, (*self._key, *params)).fetchone()
+
+
+class ColumnStorage:
+    """
+    Cached values of one model, stored by column to keep memory low (no object per record or per field):
+        - each record gets a row number, rows of discarded records are reused
+        - each field gets a list of values and an array of expiration timestamps (0 = no value), indexed by row
+    Records are kept in LRU order (reading or setting a value moves the record at the end), with their last access time
+    All methods are atomic, so a storage can be shared between threads
+    """
+    __slots__ = ('_rows', '_free_rows', '_values', '_expirations', '_access', '_lock')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows = dict()             # res_id -> row, least recently used first
+        self._free_rows = list()
+        self._values = dict()           # field -> [value, ...]
+        self._expirations = dict()      # field -> array('d', [timestamp, ...])
+        self._access = array('d')       # row -> time.monotonic() of the last access
+
+    def __contains__(self, res_id: int):
+        return res_id in self._rows
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._rows))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def transaction(self):
+        return nullcontext()
+
+    def expiration(self, res_id: int, field: str) -> float:
+        with self._lock:
+            row = self._rows.get(res_id)
+            expirations = self._expirations.get(field)
+            if row is None or expirations is None or row >= len(expirations):
+                return 0.0
+            return expirations[row]
+
+    def value(self, res_id: int, field: str) -> Any:
+        return self.lookup(res_id, field)[0]
+
+    def lookup(self, res_id: int, field: str) -> tuple[Any, float]:
+        """ (value, expiration) at once, so the value can't be evicted by another thread in between """
+        with self._lock:
+            row = self._rows.get(res_id)
+            values = self._values.get(field)
+            if row is None or values is None or row >= len(values):
+                return None, 0.0
+            self._touch(res_id, row)
+            return values[row], self._expirations[field][row]
+
+    def set(self, res_id: int, field: str, value: Any, expiration: float) -> bool:
+        """ Store the value, return True if the record was not in the storage yet """
+        with self._lock:
+            return self._set(res_id, field, value, expiration)
+
+    def discard(self, res_id: int) -> bool:
+        """ Remove all values of a record, return True if it was in the storage """
+        with self._lock:
+            row = self._rows.pop(res_id, None)
+            if row is None:
+                return False
+            for field, values in self._values.items():
+                if row < len(values):
+                    values[row] = None
+                    self._expirations[field][row] = 0.0
+            self._free_rows.append(row)
+            return True
+
+    def lru(self) -> int:
+        """ Least recently used record """
+        with self._lock:
+            return next(iter(self._rows))
+
+    def last_access(self, res_id: int) -> float:
+        with self._lock:
+            return self._access[self._rows[res_id]]
+
+    def expired_ids(self, now: float) -> list[int]:
+        """ Records whose values are all expired at `now` """
+        with self._lock:
+            expirations = list(self._expirations.values())
+            return [
+                res_id for res_id, row in self._rows.items()
+                if all(row >= len(column) or column[row] <= now for column in expirations)
+            ]
+
+    def _set(self, res_id: int, field: str, value: Any, expiration: float) -> bool:
+        row = self._rows.get(res_id)
+        is_new = row is None
+        if is_new:
+            row = self._free_rows.pop() if self._free_rows else len(self._rows)
+            if row >= len(self._access):
+                self._access.append(0.0)
+        self._touch(res_id, row)
+
+        if field not in self._values:
+            self._values[field] = list()
+            self._expirations[field] = array('d')
+        values, expirations = self._values[field], self._expirations[field]
+        if row >= len(values):
+            missing = row + 1 - len(values)
+            values.extend([None] * missing)
+            expirations.frombytes(bytes(expirations.itemsize * missing))
+
+        values[row] = value
+        expirations[row] = expiration
+        return is_new
+
+    def _touch(self, res_id: int, row: int):
+        self._rows.pop(res_id, None)
+        self._rows[res_id] = row
+        self._access[row] = time.monotonic()
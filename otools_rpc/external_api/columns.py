@@ -0,0 +1,212 @@
+from array import array
+from datetime import date, datetime
+from typing import Any, Callable, Iterable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DAYS = date(1970, 1, 1).toordinal()
+NAT = -2 ** 63          # Empty date in the int64 buffers, the same value as numpy's NaT
+
+
+class Column:
+    """ Values of one field as a list of Python values, for the types without a compact representation """
+
+    def __init__(self):
+        self.values = list()
+
+    def __len__(self):
+        return len(self.values)
+
+    def extend(self, values: Iterable[Any]):
+        self.values.extend(values)
+
+    def to_numpy(self):
+        res = numpy.empty(len(self.values), dtype=object)
+        res[:] = self.values        # Not numpy.array(), it would make 2D arrays of x2many ids
+        return res
+
+    def to_arrow(self):
+        return pyarrow.array(self.values)
+
+
+class NumberColumn(Column):
+    """ integer, float, monetary and boolean fields, in an array.array numpy uses without a copy """
+    DTYPES = {'q': 'int64', 'd': 'float64', 'b': 'int8'}
+
+    def __init__(self, typecode: str):
+        self.values = array(typecode)
+
+    def extend(self, values: Iterable[Any]):
+        self.values.extend(value or 0 for value in values)
+
+    def to_numpy(self):
+        res = numpy.frombuffer(self.values, dtype=self.DTYPES[self.values.typecode])
+        return res.astype(bool) if self.values.typecode == 'b' else res
+
+    def to_arrow(self):
+        if numpy is not None:
+            return pyarrow.array(self.to_numpy())
+        return pyarrow.array(list(map(bool, self.values)) if self.values.typecode == 'b' else self.values.tolist())
+
+
+class RelationColumn(NumberColumn):
+    """ Ids of a many2one, 0 if empty (null with Arrow) """
+
+    def __init__(self):
+        super().__init__('q')
+
+    def to_arrow(self):
+        return pyarrow.array([value or None for value in self.values], type=pyarrow.int64())
+
+
+class DateColumn(NumberColumn):
+    """ date and datetime fields, as days or seconds since 1970-01-01 (UTC, like Odoo stores them) in an int64 buffer """
+
+    def __init__(self, field_type: str):
+        super().__init__('q')
+        self.unit = 'D' if field_type == 'date' else 's'
+
+    def extend(self, values: Iterable[Any]):
+        if self.unit == 'D':
+            self.values.extend(date.fromisoformat(value).toordinal() - EPOCH_DAYS if value else NAT for value in values)
+        else:
+            self.values.extend(int((datetime.fromisoformat(value) - EPOCH).total_seconds()) if value else NAT for value in values)
+
+    def to_numpy(self):
+        return numpy.frombuffer(self.values, dtype='int64').view(f"datetime64[{self.unit}]")
+
+    def to_arrow(self):
+        values = [None if value == NAT else value for value in self.values]
+        if self.unit == 'D':
+            return pyarrow.array(values, type=pyarrow.int32()).cast(pyarrow.date32())
+        return pyarrow.array(values, type=pyarrow.int64()).cast(pyarrow.timestamp('s'))
+
+
+class CategoryColumn(Column):
+    """ char, text and selection fields (and names of many2one), dictionary-encoded: each distinct string is kept once """
+
+    def __init__(self):
+        self.codes = array('i')         # Index in `categories`, -1 if the value is empty
+        self.categories = list()
+        self._index = dict()
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def values(self) -> list:
+        return [self.categories[code] if code >= 0 else False for code in self.codes]
+
+    def extend(self, values: Iterable[Any]):
+        index, categories, codes = self._index, self.categories, self.codes
+        for value in values:
+            if value is False or value is None:
+                codes.append(-1)
+                continue
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(categories)
+                categories.append(value)
+            codes.append(code)
+
+    def to_numpy(self):
+        # Empty values (code -1) pick the None added at the end
+        return numpy.array(self.categories + [None], dtype=object)[numpy.frombuffer(self.codes, dtype='int32')]
+
+    def to_arrow(self):
+        indices = pyarrow.array([code if code >= 0 else None for code in self.codes], type=pyarrow.int32())
+        return pyarrow.DictionaryArray.from_arrays(indices, pyarrow.array(self.categories, type=pyarrow.string()))
+
+
+# Column used for each field type, the others are kept as lists of Python values (x2many ids, binaries, json...)
+COLUMN_TYPES = {
+    'integer': lambda field_type: NumberColumn('q'),
+    'float': lambda field_type: NumberColumn('d'),
+    'monetary': lambda field_type: NumberColumn('d'),
+    'boolean': lambda field_type: NumberColumn('b'),
+    'date': DateColumn,
+    'datetime': DateColumn,
+    'char': lambda field_type: CategoryColumn(),
+    'text': lambda field_type: CategoryColumn(),
+    'selection': lambda field_type: CategoryColumn(),
+    'html': lambda field_type: CategoryColumn(),
+}
+
+
+class Columns:
+    """
+    Values of records stored by field instead of by record, see records.to_columns() and env[model].read_columns():
+    no dict per record, numbers and dates in flat buffers, each distinct string stored once.
+    A many2one gives 2 columns: `field` (ids, 0 if empty) and `field.name`
+    >>> columns = env['account.move.line'].read_columns([('parent_state', '=', 'posted')], ['date', 'balance', 'account_id'])
+    >>> columns['account_id.name'].values[:2]
+    >>> ['701000 Sales', '701000 Sales']
+    >>> columns.to_numpy()['balance'].sum()     # Or to_arrow(), to_parquet(path)
+    """
+
+    def __init__(self, fields: list[str], fields_info: dict):
+        self.columns = {'id': NumberColumn('q')}
+        self._getters = {'id': _getter('id')}
+        for field in fields:
+            field_type = fields_info.get(field, dict()).get('type')
+            if field == 'id':
+                continue
+            elif field_type == 'many2one':
+                self.columns[field], self._getters[field] = RelationColumn(), _getter(field, 0)
+                self.columns[f"{field}.name"], self._getters[f"{field}.name"] = CategoryColumn(), _getter(field, 1)
+            else:
+                self.columns[field], self._getters[field] = COLUMN_TYPES.get(field_type, lambda field_type: Column())(field_type), _getter(field)
+
+    def __str__(self):
+        return f"Columns({len(self)} rows x {list(self.columns)})"
+
+    __repr__ = __str__
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __getitem__(self, name: str) -> Column:
+        return self.columns[name]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def extend(self, rows: list[dict]):
+        """ Append rows as read() returns them, they can be dropped right after """
+        for name, column in self.columns.items():
+            column.extend(map(self._getters[name], rows))
+
+    def to_numpy(self) -> dict:
+        """ {column: numpy array}, numbers are not copied, strings are object arrays (None if empty) """
+        if numpy is None:
+            raise ImportError("Columns.to_numpy() requires numpy, install it with: pip install numpy")
+        return {name: column.to_numpy() for name, column in self.columns.items()}
+
+    def to_arrow(self):
+        """ A pyarrow.Table, strings are dictionary-encoded and empty relations/dates are nulls """
+        if pyarrow is None:
+            raise ImportError("Columns.to_arrow() requires pyarrow, install it with: pip install pyarrow")
+        return pyarrow.table({name: column.to_arrow() for name, column in self.columns.items()})
+
+    def to_parquet(self, path: str, **kw):
+        """ Write the columns in a Parquet file, `kw` are given to pyarrow.parquet.write_table() """
+        table = self.to_arrow()
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, path, **kw)
+
+
+def _getter(field: str, index: int = None) -> Callable[[dict], Any]:
+    """ Value of `field` in a row of read(), or one of its items for a many2one ((id, name) or False) """
+    if index is None:
+        return lambda row: row.get(field, False)
+    return lambda row: row[field][index] if row.get(field) else False
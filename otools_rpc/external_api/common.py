@@ -1,3 +1,4 @@
+import inspect
 
 # --------------------------------------------
 #                DECORATORS
@@ -8,10 +9,16 @@ def model(fn):
     return fn
 
 def log_request(fn):
+    """ Log and measure each call (see Instrumentation), works on coroutine functions too """
+    if inspect.iscoroutinefunction(fn):
+        async def async_wrapper(self, *args, **kwargs):
+            with self.env.log_request(self, *args, **kwargs):
+                return await fn(self, *args, **kwargs)
+        return async_wrapper
+
     def wrapper(self, *args, **kwargs):
-        # Todo: add more infos about performance.
-        self.env.log_request(self, *args, **kwargs)
-        return fn(self, *args, **kwargs)
+        with self.env.log_request(self, *args, **kwargs):
+            return fn(self, *args, **kwargs)
     return wrapper
 
 def assert_same_model(op=None):
@@ -23,17 +30,6 @@ def assert_same_model(op=None):
         return wrapper
     return decorator
 
-def cache(op=None):
-    def decorator(fn):
-        def wrapper(self, *args, **kwargs):
-            res = fn(self, *args, **kwargs)
-            if self.env.cache_enabled:
-                self.env.logger.log("FTRACE", f"[CACHE] {op or fn.__name__} on {self} {args} {kwargs}")
-                self.env.cache[self._name].update(op, self, res, *args, **kwargs)
-            return res
-        return wrapper
-    return decorator
-
 
 
 # --------------------------------------------
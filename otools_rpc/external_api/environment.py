@@ -1,10 +1,19 @@
+import copy
 import sys
-import xmlrpc.client
 import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Union
 from loguru import logger as loguru_logger
 from .recordset import RecordSet
 from .common import frozendict
 from .cache import Cache
+from .cache_backends import CacheBackend
+from .batch import Batch
+from .instrumentation import Instrumentation
+from .parallel import ParallelResult, parallel_map
+from .query_cache import QueryCache
+from .transport import PROTOCOLS, ConnectionPool
 
 
 class Environment(dict):
@@ -19,9 +28,29 @@ class Environment(dict):
             logger: loguru_logger = None,
             log_level: str = None,
 
+            protocol: Union[str, Callable] = 'xmlrpc',
+            chunk_size: int = 1000,
+            max_workers: int = 1,
+            pool_size: int = 10,
+            timeout: float = None,
+            retries: int = 3,
+            retry_backoff: float = 0.3,
+            requests_max: int = 1000,
+            request_sinks: list[Callable] = None,
+
             cache_default_expiration: int = 10,
             cache_no_expiration: bool = False,
             cache_enabled: bool = True,
+            cache_prefetch_max: int = 1000,
+            cache_prefetch_fields: bool = False,
+            cache_max_records: int = None,
+            cache_max_total_records: int = None,
+            cache_sweep_interval: int = 60,
+            cache_invalidation_interval: int = None,
+            cache_invalidation_refresh: bool = False,
+            cache_backend: CacheBackend = None,
+            cache_fields_path: str = None,
+            query_cache_ttl: float = None,
             **kw
     ):
         super().__init__(**kw)
@@ -37,7 +66,7 @@ class Environment(dict):
         self.logger = logger if isinstance(logger, type(loguru_logger)) else loguru_logger
         try:
             self.logger.level("FTRACE", no=3, color="<blue>")       # Allow multiple environnements to share the same logger
-        except TypeError:
+        except (TypeError, ValueError):
             pass
 
         if logger is None:
@@ -45,10 +74,26 @@ class Environment(dict):
             self.logger.add(sys.stderr, level=log_level or "INFO")
 
 
-        self.common = xmlrpc.client.ServerProxy(f"{self._url}/xmlrpc/2/common", allow_none=True)
+        # --------------------------------------------
+        #                 REQUESTS
+        # --------------------------------------------
+        # Big read/write/unlink are split in chunks of `chunk_size` ids, sent by up to `max_workers` threads
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retry_backoff = retry_backoff      # Also used between the retries of env.map()
+
+        # All proxies share a pool of keep-alive connections (at least one per worker), safe to use from any thread
+        # `protocol` is either 'xmlrpc', 'jsonrpc' (faster to encode/decode) or a custom factory, see transport.PROTOCOLS
+        if isinstance(protocol, str) and protocol not in PROTOCOLS:
+            raise ValueError(f"Unknown protocol {protocol}, use one of {list(PROTOCOLS)} or a proxy factory")
+        self.protocol = protocol
+        self.pool = ConnectionPool(self._url, size=max(pool_size, max_workers), timeout=timeout, retries=retries, backoff_factor=retry_backoff)
+        self.common = self._proxy('common')
         self.models = None
-        self.requests = list()
+        # The last `requests_max` calls are kept with their duration and size, `request_sinks` receive all of them
+        self.instrumentation = Instrumentation(self, requests_max=requests_max, sinks=request_sinks)
         self._context = frozendict()
+        self._local = threading.local()         # Per thread state (current batch), shared by copies of with_context()
 
         # Todo: make it an object (RecordSet)
         self.user = None
@@ -61,7 +106,18 @@ class Environment(dict):
         self.cache_enabled = cache_enabled
         self.cache_no_expiration = cache_no_expiration
         self.cache_default_expiration = cache_default_expiration
+        self.cache_prefetch_max = cache_prefetch_max            # Max number of siblings read at once on a cache miss
+        self.cache_prefetch_fields = cache_prefetch_fields      # Also prefetch all cheap stored fields (Odoo behavior)
+        self.cache_max_records = cache_max_records              # Per model, least recently used records are evicted
+        self.cache_max_total_records = cache_max_total_records  # Same for all models together
+        self.cache_sweep_interval = cache_sweep_interval        # Seconds between 2 removals of fully expired records
+        self.cache_invalidation_interval = cache_invalidation_interval  # Seconds between 2 polls of records changed on the server, see Cache.poll_changes()
+        self.cache_invalidation_refresh = cache_invalidation_refresh    # Read changed records again instead of evicting them
+        self.cache_backend = cache_backend                      # Where values are stored, see cache_backends (default: memory)
+        self.cache_fields_path = cache_fields_path              # File keeping fields metadata between runs, see metadata.FieldsFile
         self.cache = Cache(self)
+        self.query_cache_ttl = query_cache_ttl                  # Seconds search() and search_count() results are kept, see QueryCache
+        self.query_cache = QueryCache(self)
 
 
         if auto_auth:
@@ -91,9 +147,31 @@ class Environment(dict):
     def context(self):
         return self._context
 
+    @property
+    def _batch(self):
+        return getattr(self._local, 'batch', None)
+
+    @_batch.setter
+    def _batch(self, batch):
+        self._local.batch = batch
+
+    @property
+    def current_batch(self):
+        return self._batch
+
+    @property
+    def batching(self):
+        """ True if write/create/unlink calls must be queued in the current batch instead of being sent """
+        return self._batch is not None and not self._batch.flushing
+
+    @property
+    def requests(self):
+        """ The last calls sent to the server (up to `requests_max`), see Instrumentation """
+        return self.instrumentation.requests
+
     @property
     def requests_count(self):
-        return len(self.requests)
+        return self.instrumentation.calls_count
 
     @property
     def cache_expiration(self):
@@ -113,7 +191,7 @@ class Environment(dict):
         uid = self.common.authenticate(self._db, self._username, self._password, {})
         if uid:
             self.user = {'id': uid}
-            self.models = xmlrpc.client.ServerProxy(f"{self._url}/xmlrpc/2/object", allow_none=True)
+            self.models = self._proxy('object')
             self.user |= self['res.users'].browse(uid).read(['name', 'login'])[0]
             self.logger.info(f"Login successful on {self._url} ({self._db}) with res.users({uid}) - {self.user.get('name')} ({self.user.get('login')})")
         else:
@@ -129,20 +207,76 @@ class Environment(dict):
         return None
 
     def with_context(self, **kw):
-        self._context = self._context.copy(**kw)
-        return self
-
-
+        """
+        Return a copy of the environment with an updated default context, sharing everything else (connections, cache,
+        authentication...). The environment itself is never modified, so it can be shared between threads:
+        >>> env_fr = env.with_context(lang='fr_FR')
+        """
+        env = copy.copy(self)
+        env._context = self._context.copy(**kw)
+        return env
+
+    @contextmanager
+    def batch(self):
+        """
+        Queue write(), create() and unlink() calls and send them with as few requests as possible when leaving the block
+        (see Batch). These calls return a BatchResult instead of their usual result:
+        >>> with env.batch():
+        >>>     for partner in partners:
+        >>>         partner.write({'ref': compute_ref(partner)})      # Same ref => same request
+        >>>     new_partner = env['res.partner'].create({'name': 'Mitchell Admin'})
+        >>> new_partner.result()
+        >>> res.partner(42)
+        If an exception is raised inside the block, queued operations are discarded (and their records evicted from the cache).
+        """
+        if self._batch is not None:
+            yield self._batch           # Nested batches are merged in the outer one
+            return
+
+        self._batch = Batch(self)
+        try:
+            yield self._batch
+            self._batch.flush()
+        except BaseException:
+            self._batch.discard()
+            raise
+        finally:
+            self._batch = None
+
+    def map(
+            self,
+            fn: Callable,
+            records: RecordSet,
+            chunk_size: int = None,
+            workers: int = None,
+            rate: float = None,
+            retries: int = 2,
+            retry_unsafe: bool = False,
+    ) -> ParallelResult:
+        """
+        Call `fn(chunk)` on chunks of `chunk_size` records (default: env.chunk_size), by up to `workers` threads
+        (default: env.max_workers) starting at most `rate` calls per second. Chunks failing on a transient error the
+        server can't have run them through (connection refused, 429/503, concurrent update...) are retried `retries`
+        times. Timeouts, lost connections and 502/504 are retried only with `retry_unsafe`: the call may have been
+        run already, only use it when `fn` can safely run twice. Never raises: results and failures are collected
+        per chunk, see ParallelResult
+        >>> res = env.map(lambda moves: moves.action_post(), invoices, chunk_size=50, workers=4)
+        """
+        return parallel_map(self, fn, records, chunk_size=chunk_size, workers=workers, rate=rate, retries=retries, retry_unsafe=retry_unsafe)
+
+    def flush(self):
+        """ Send the operations queued in the current batch without waiting for the end of the block """
+        if self._batch is not None:
+            self._batch.flush()
+
+
+    @contextmanager
     def log_request(self, recordset, *args, **kwargs):
-        # Todo: add more infos about performance.
         self.logger.trace(f"Executing {args[0]} on {recordset}")
         self.logger.log("FTRACE", f"└── with args: {args[1:]} / kwargs: {kwargs}")
-        self.requests.append({
-            'model': recordset._name,
-            'method': args[0],
-            'args': args[1:],
-            'kwargs': kwargs
-        })
+        with self.instrumentation.measure(recordset, args[0], args[1:], kwargs) as record:
+            yield record
+        self.logger.trace(f"└── done in {record['duration'] * 1000:.1f} ms ({record['request_size']} bytes sent, {record['response_size']} received)")
 
 
     # --------------------------------------------
@@ -150,6 +284,10 @@ class Environment(dict):
     # --------------------------------------------
 
 
+    def _proxy(self, service: str):
+        factory = PROTOCOLS[self.protocol] if isinstance(self.protocol, str) else self.protocol
+        return factory(self._url, service, self.pool)
+
     def _extract_db_from_url(self, url: str = None) -> str:
         url = url or self._url
         db_re = r"(https?:\/\/)?([w]{3}\.)?([\w-]*)(.\w*)([\/\w]*)"
@@ -0,0 +1,138 @@
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+# Upper bounds (seconds) of the latency histograms, same spirit as Prometheus default buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float('inf'))
+
+# Record of the call being executed by the current thread/task, so the transport can report the bytes it sends
+_current_request = ContextVar('otools_rpc_current_request', default=None)
+
+
+def add_transfer(sent: int, received: int):
+    """ Called by transports for each HTTP request: count its bytes in the call being executed, if any """
+    record = _current_request.get()
+    if record is not None:
+        record['request_size'] += sent
+        record['response_size'] += received
+
+
+class Instrumentation:
+    """
+    Measure every call sent to the server by an environment (env.instrumentation):
+        - the last `requests_max` calls are kept in `requests` (a ring buffer), with their duration and size in bytes
+        - aggregates per (model, method) with a latency histogram, see summary()
+        - cache hits/misses are in env.cache.stats
+    Each record is also given to the sinks, to export them (Prometheus, OpenTelemetry, logs...):
+    >>> histogram = prometheus_client.Histogram('odoo_rpc_seconds', 'Odoo calls', ['model', 'method'])
+    >>> env.instrumentation.add_sink(lambda r: histogram.labels(r['model'], r['method']).observe(r['duration']))
+    """
+
+    def __init__(self, env, requests_max: int = 1000, sinks: list[Callable] = None):
+        self._env = env
+        self._lock = threading.Lock()
+        self.requests = deque(maxlen=requests_max)
+        self.sinks = list(sinks or list())
+        self.calls_count = 0
+        self._stats = dict()
+
+    def __str__(self):
+        return f"Instrumentation({self._env})"
+
+    # --------------------------------------------
+    #                   PUBLIC
+    # --------------------------------------------
+
+
+    def add_sink(self, sink: Callable[[dict], None]):
+        """ `sink` is called with the record of each call once it's done, from the thread that made it """
+        self.sinks.append(sink)
+
+    def remove_sink(self, sink: Callable[[dict], None]):
+        self.sinks.remove(sink)
+
+    @contextmanager
+    def measure(self, recordset, method: str, args: tuple, kwargs: dict):
+        """ Wrap the execution of one call, see common.log_request """
+        record = {
+            'model': recordset._name,
+            'method': method,
+            'args': args,
+            'kwargs': kwargs,
+            'start': time.time(),
+            'duration': None,
+            'request_size': 0,
+            'response_size': 0,
+            'error': None,
+        }
+        token = _current_request.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record['error'] = type(e).__name__
+            raise
+        finally:
+            record['duration'] = time.perf_counter() - start
+            _current_request.reset(token)
+            self._add(record)
+
+    def summary(self) -> list[dict]:
+        """
+        Aggregates per (model, method), most time consuming first. `buckets` is a cumulative histogram of durations:
+        {upper bound in seconds: number of calls lasting at most that long}, like Prometheus histograms
+        """
+        with self._lock:
+            stats = [dict(stat, histogram=list(stat['histogram'])) for stat in self._stats.values()]
+
+        for stat in stats:
+            histogram = stat.pop('histogram')
+            stat['avg_duration'] = stat['duration'] / stat['count']
+            stat['buckets'] = {bound: sum(histogram[:i + 1]) for i, bound in enumerate(LATENCY_BUCKETS)}
+        return sorted(stats, key=lambda stat: stat['duration'], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self._stats.clear()
+            self.calls_count = 0
+
+    # --------------------------------------------
+    #                   PRIVATE
+    # --------------------------------------------
+
+
+    def _add(self, record: dict):
+        with self._lock:
+            self.requests.append(record)
+            self.calls_count += 1
+            stat = self._stats.get((record['model'], record['method']))
+            if stat is None:
+                stat = self._stats[(record['model'], record['method'])] = {
+                    'model': record['model'],
+                    'method': record['method'],
+                    'count': 0,
+                    'errors': 0,
+                    'duration': 0.0,
+                    'max_duration': 0.0,
+                    'request_size': 0,
+                    'response_size': 0,
+                    'histogram': [0] * len(LATENCY_BUCKETS),
+                }
+            stat['count'] += 1
+            stat['errors'] += record['error'] is not None
+            stat['duration'] += record['duration']
+            stat['max_duration'] = max(stat['max_duration'], record['duration'])
+            stat['request_size'] += record['request_size']
+            stat['response_size'] += record['response_size']
+            stat['histogram'][bisect_left(LATENCY_BUCKETS, record['duration'])] += 1
+
+        for sink in self.sinks:
+            try:
+                sink(record)
+            except Exception as e:
+                self._env.logger.warning(f"Instrumentation sink {sink} failed: {e}")
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Attributes of fields_get() actually used by the library, asking only for them makes the response way smaller
+FIELDS_ATTRIBUTES = ['type', 'relation', 'relation_field', 'store']
+
+# Installed modules are compared to the ones of the file, any install/upgrade/uninstall invalidates it
+MODULES_DOMAIN = [('state', '=', 'installed')]
+MODULES_FIELDS = ['name', 'latest_version']
+
+
+class FieldsFile:
+    """
+    Local JSON file keeping the fields metadata of models between two runs, so a process doesn't have to call
+    fields_get() again for each model it touches:
+    >>> env = Environment(url, username, password, db=db, cache_fields_path='~/.cache/otools_rpc/fields.json')
+    Metadata is stored per database (`key`), along with a fingerprint of its installed modules and their versions.
+    It's loaded the first time a model is needed, and ignored if the modules of the server changed since then.
+    """
+    VERSION = 1         # Bump when the format or FIELDS_ATTRIBUTES change, older files are ignored
+
+    def __init__(self, path: str, key: str):
+        self.path = os.path.expanduser(path)
+        self.key = key
+        self.fingerprint = None
+        self._models = None
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"FieldsFile({self.path})"
+
+    @property
+    def loaded(self):
+        return self._models is not None
+
+    @staticmethod
+    def compute_fingerprint(modules: list[dict]) -> str:
+        """ Hash of the installed modules and their versions, as returned by search_read(MODULES_DOMAIN, MODULES_FIELDS) """
+        versions = sorted((module['name'], module.get('latest_version') or '') for module in modules)
+        return hashlib.sha1(json.dumps(versions).encode()).hexdigest()
+
+    def load(self, modules: list[dict]):
+        """ Load the metadata of the file if it was saved with the same installed `modules` """
+        self.fingerprint = self.compute_fingerprint(modules)
+        entry = self._read().get(self.key) or dict()
+        self._models = entry.get('models', dict()) if entry.get('modules') == self.fingerprint else dict()
+
+    def get(self, model: str) -> dict:
+        return self._models.get(model) if self.loaded else None
+
+    def set(self, model: str, fields: dict):
+        """ Add the metadata of `model` to the file, without losing models saved in the meantime by other processes """
+        if not self.loaded:
+            return
+
+        with self._lock:
+            self._models[model] = fields
+            databases = self._read()
+            entry = databases.get(self.key) or dict()
+            if entry.get('modules') != self.fingerprint:
+                entry = {'modules': self.fingerprint, 'models': dict()}
+            entry['models'][model] = fields
+            databases[self.key] = entry
+            self._write(databases)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+        return content.get('databases', dict()) if content.get('version') == self.VERSION else dict()
+
+    def _write(self, databases: dict):
+        """ Write to a temporary file then rename it, so readers never see a partial file """
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.fields-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': self.VERSION, 'databases': databases}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
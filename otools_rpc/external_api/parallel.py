@@ -0,0 +1,208 @@
+import asyncio
+import http.client
+import socket
+import threading
+import time
+import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from .utils import split_every
+
+# Odoo answers these when it's overloaded or when two transactions collide, trying again later usually works
+TRANSIENT_HTTP_CODES = [429, 503]       # Refused before the call is run
+UNSAFE_HTTP_CODES = [502, 504]          # The call may have run behind the proxy
+TRANSIENT_FAULTS = ['could not serialize access', 'concurrent update', 'deadlock detected', 'lock not available']
+
+
+def is_transient_error(e: Exception, unsafe: bool = False) -> bool:
+    """
+    True if the call may succeed when retried without being run twice: refused connection, overloaded server,
+    concurrent transactions (rolled back by Odoo). With `unsafe`, also the errors after which the server may have run
+    the call already: timeouts, lost connections, 502/504 answers
+    """
+    if isinstance(e, ConnectionRefusedError):
+        return True
+    if isinstance(e, (ConnectionError, socket.timeout, TimeoutError, http.client.HTTPException)):
+        return unsafe
+    if isinstance(e, xmlrpc.client.ProtocolError):
+        return e.errcode in TRANSIENT_HTTP_CODES or (unsafe and e.errcode in UNSAFE_HTTP_CODES)
+    if isinstance(e, xmlrpc.client.Fault):
+        return any(message in str(e.faultString).lower() for message in TRANSIENT_FAULTS)
+    return False
+
+
+class RateLimiter:
+    """ Let at most `rate` calls start per second, whatever the number of threads waiting for it """
+
+    def __init__(self, rate: float = None):
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self):
+        time.sleep(self.delay())
+
+    def delay(self) -> float:
+        """ Book the next start, return the seconds to wait for it """
+        if not self.rate:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + 1 / self.rate
+        return start - now
+
+
+class ChunkResult:
+    """ Outcome of one chunk of a parallel operation """
+
+    def __init__(self, records):
+        self.records = records
+        self.result = None
+        self.exception = None
+        self.attempts = 0
+
+    def __str__(self):
+        state = f"failed: {self.exception!r}" if self.exception else f"= {self.result}"
+        return f"ChunkResult({self.records} {state})"
+
+    __repr__ = __str__
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+
+class ParallelResult:
+    """
+    Per-chunk results of env.map() / records.parallel_call(), in the order of the chunks:
+    >>> res = invoices.parallel_call('action_post', workers=4)
+    >>> res.ok, res.failed_records
+    >>> (False, account.move(42, 43))
+    >>> res.raise_if_failed()
+    """
+
+    def __init__(self, chunks: list[ChunkResult]):
+        self.chunks = chunks
+
+    def __str__(self):
+        return f"ParallelResult({len(self.chunks)} chunks, {len(self.failures)} failed)"
+
+    __repr__ = __str__
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def __len__(self):
+        return len(self.chunks)
+
+    @property
+    def ok(self):
+        return all(chunk.ok for chunk in self.chunks)
+
+    @property
+    def results(self) -> list[Any]:
+        """ Results of the chunks that succeeded """
+        return [chunk.result for chunk in self.chunks if chunk.ok]
+
+    @property
+    def failures(self) -> list[ChunkResult]:
+        return [chunk for chunk in self.chunks if not chunk.ok]
+
+    @property
+    def failed_records(self):
+        return self._union([chunk.records for chunk in self.failures])
+
+    @property
+    def succeeded_records(self):
+        return self._union([chunk.records for chunk in self.chunks if chunk.ok])
+
+    def raise_if_failed(self):
+        """ Raise the exception of the first failed chunk, if any """
+        for chunk in self.failures:
+            raise chunk.exception
+
+    def _union(self, recordsets: list):
+        if not self.chunks:
+            return None
+        first = self.chunks[0].records
+        return first.browse([res_id for records in recordsets for res_id in records.ids])
+
+
+def parallel_map(
+        env,
+        fn: Callable,
+        records,
+        chunk_size: int = None,
+        workers: int = None,
+        rate: float = None,
+        retries: int = 2,
+        retry_unsafe: bool = False,
+) -> ParallelResult:
+    """ See Environment.map() """
+    if env.batching:
+        env.flush()         # The batch is per thread, the pool threads wouldn't see it
+    chunks = [ChunkResult(records.browse(ids)) for ids in split_every(chunk_size or env.chunk_size, records.ids)]
+    limiter = RateLimiter(rate)
+
+    def run(chunk: ChunkResult):
+        while True:
+            limiter.wait()
+            chunk.attempts += 1
+            try:
+                chunk.result = fn(chunk.records)
+                chunk.exception = None
+                return
+            except Exception as e:
+                chunk.exception = e
+                if chunk.attempts > retries or not is_transient_error(e, unsafe=retry_unsafe):
+                    env.logger.warning(f"{chunk.records} failed after {chunk.attempts} attempt(s): {e!r}")
+                    return
+                env.logger.debug(f"{chunk.records} failed ({e!r}), retrying")
+                time.sleep(env.retry_backoff * (2 ** (chunk.attempts - 1)))
+
+    workers = workers or env.max_workers
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            run(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+            list(executor.map(run, chunks))
+    return ParallelResult(chunks)
+
+
+
+async def async_parallel_map(
+        env,
+        fn: Callable,
+        records,
+        chunk_size: int = None,
+        workers: int = None,
+        rate: float = None,
+        retries: int = 2,
+        retry_unsafe: bool = False,
+) -> ParallelResult:
+    """ See AsyncEnvironment.map(): same as parallel_map(), with up to `workers` coroutines on the event loop """
+    chunks = [ChunkResult(records.browse(ids)) for ids in split_every(chunk_size or env.chunk_size, records.ids)]
+    limiter = RateLimiter(rate)
+    semaphore = asyncio.Semaphore(max(workers or env.max_workers, 1))
+
+    async def run(chunk: ChunkResult):
+        async with semaphore:
+            while True:
+                await asyncio.sleep(limiter.delay())
+                chunk.attempts += 1
+                try:
+                    chunk.result = await fn(chunk.records)
+                    chunk.exception = None
+                    return
+                except Exception as e:
+                    chunk.exception = e
+                    if chunk.attempts > retries or not is_transient_error(e, unsafe=retry_unsafe):
+                        env.logger.warning(f"{chunk.records} failed after {chunk.attempts} attempt(s): {e!r}")
+                        return
+                    env.logger.debug(f"{chunk.records} failed ({e!r}), retrying")
+                    await asyncio.sleep(env.retry_backoff * (2 ** (chunk.attempts - 1)))
+
+    await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return ParallelResult(chunks)
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Any
+from .utils import freeze
+
+
+_MISSING = object()
+
+
+class QueryCache:
+    """
+    Results of queries kept a few seconds, per model, shared by the copies of an environment:
+        - search() and search_count() with Environment(query_cache_ttl=...), keyed by domain, order, limit, offset, context
+        - aggregate(cache_ttl=...)
+    Any create(), write() or unlink() made through the environment forgets all of them, as a domain can depend on
+    other models (ex: ('partner_id.country_id', '=', 75)). So do changes found by env.cache.poll_changes()
+    >>> env = Environment(url, username, password, db=db, query_cache_ttl=30)
+    >>> env['sale.order'].search_count([('state', '=', 'sale')])     # Asked to the server once every 30 seconds
+    """
+
+    def __init__(self, env, max_entries: int = 1000):
+        self._env = env
+        self._lock = threading.Lock()
+        self._entries = dict()      # model -> {key: (expiration, result)}, oldest first
+        self.max_entries = max_entries      # Per model, the oldest results are dropped first
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def __str__(self):
+        return f"QueryCache({self._env})"
+
+    def __len__(self):
+        return sum(map(len, self._entries.values()))
+
+    # --------------------------------------------
+    #                   PUBLIC
+    # --------------------------------------------
+
+
+    @staticmethod
+    def key(*parts) -> tuple:
+        """ Hashable key made of the parts of a query (domain, context...) """
+        return freeze(parts)
+
+    def get(self, model: str, key: tuple) -> Any:
+        """ The result stored for `key`, or _MISSING if there is none or it expired """
+        with self._lock:
+            expiration, res = self._entries.get(model, dict()).get(key, (0, _MISSING))
+            if expiration <= time.monotonic():
+                self._entries.get(model, dict()).pop(key, None)
+                self.stats['misses'] += 1
+                return _MISSING
+            self.stats['hits'] += 1
+            return res
+
+    def set(self, model: str, key: tuple, res: Any, ttl: float):
+        with self._lock:
+            entries = self._entries.setdefault(model, dict())
+            entries.pop(key, None)
+            entries[key] = (time.monotonic() + ttl, res)
+            while len(entries) > self.max_entries:
+                del entries[next(iter(entries))]
+
+    def invalidate(self, model: str = None):
+        """ Forget the results of `model`, or of every model """
+        with self._lock:
+            if model is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(model, None)
@@ -1,25 +1,39 @@
 import xmlrpc.client
-from functools import reduce
-from .common import assert_same_model, cache, log_request, model, frozendict
-from .utils import is_relational_field
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from .columns import Columns
+from .common import assert_same_model, log_request, model, frozendict
+from .metadata import FIELDS_ATTRIBUTES
+from .query_cache import _MISSING
+from .utils import freeze, is_relational_field, path_tree, relational_ids, split_every, tree_paths
 from typing import Union
 
+# Types whose truthiness in Python is the same as a ('field', '!=', False) domain on the server
+SERVER_TESTABLE_TYPES = ['many2one', 'one2many', 'many2many', 'boolean', 'date', 'datetime']
+
 
 class RecordSet:
-    def __init__(self, name, env, ids: list[int] = None, context: frozendict = None):
+    # No __dict__: iterating a recordset creates one instance per record, they must be as light as possible
+    __slots__ = ('_name', '_env', '_ids', '_id_set', '_prefetch_ids', '_context')
+
+    def __init__(self, name, env, ids: list[int] = None, context: frozendict = None, prefetch_ids: list[int] = None):
         self._name = name
         self._env = env
-        self._curr = -1
-        self._ids = self._sanitize_ids(ids or list())
+        self._ids = self._sanitize_ids(ids)         # A tuple, never modified (recordsets may be shared)
+        self._id_set = None                         # Built on the first membership test, see _ids_set
+
+        # Records obtained by iterating (or slicing) a recordset remember the ids of their parent,
+        # so a cache miss on one of them is resolved for all its siblings in a single read
+        self._prefetch_ids = prefetch_ids if prefetch_ids is not None else self._ids
 
         """
         Each recordset has its own context, but inherits it:
             1) from the recordset it was created
             2) from the general environment 
+        Contexts are immutable (with_context() returns a new recordset), so they are shared instead of copied
         """
-        self._context = context.copy() if context is not None else frozendict()
-
-        self.logger = self._env.logger
+        self._context = context if context is not None else frozendict()
 
     def __str__(self):
         return f"{self._name}({', '.join(map(str, self._ids))})"
@@ -33,38 +47,64 @@ class RecordSet:
         return len(self._ids)
 
     def __iter__(self):
-        self._curr = -1
-        return self
-
-    def __next__(self):
-        if self._curr < len(self) - 1:
-            self._curr += 1
-            return self._recordset(self._ids[self._curr])
-        raise StopIteration
+        # No cursor stored on the recordset: it can be iterated by several threads (or nested loops) at the same time
+        new, prefetch_ids = self._new, self._prefetch_ids
+        return (new((res_id,), prefetch_ids) for res_id in self._ids)
 
     def __getitem__(self, item):
         if isinstance(item, slice):
-            return self._recordset(self._ids[item])
+            return self._new(self._ids[item], prefetch_ids=self._prefetch_ids)
         elif isinstance(item, str):
             return getattr(self, item)
 
     def __getattr__(self, attr):
         if attr != 'fields_get' and self._env.cache[self._name].field_exists(attr):
-            return self._env.cache[self._name].get(self._ids, attr, context=self._context)
+            self._check_cache_changes()
+            return self._env.cache[self._name].get(self._ids, attr, context=self._context, prefetch_ids=self._prefetch_ids)
         else:
             def wrapper(*args, **kw):
                 return self._execute(attr, *args, **kw)
             return wrapper
 
+    def __setattr__(self, attr, value):
+        """
+        `records.field = value` writes the field on all the records. Inside env.batch() the cache is updated at once and
+        the write is queued: assignments on many records end up in a few write() calls when the batch is flushed
+        """
+        if attr[0] == '_':
+            object.__setattr__(self, attr, value)
+        elif self._env.cache[self._name].field_exists(attr):
+            self.write({attr: self._write_value(attr, value)})
+        else:
+            raise AttributeError(f"Field {attr} does not exist on model {self._name}")
+
+    def __contains__(self, item):
+        """ `record in records` (or `res_id in records`), in constant time """
+        if isinstance(item, RecordSet):
+            if item._name != self._name:
+                raise ValueError(f"Mixed apples and oranges => cannot test if {item} is in {self}")
+            return all(res_id in self._ids_set for res_id in item._ids)
+        return item in self._ids_set
+
     # --- Operators ---
+    # All linear in the total number of ids, the order of the left operand is kept like Odoo does
     @assert_same_model('union')
     def __or__(self, other):
-        return self._recordset(self.ids + other.ids)
+        return self._new(tuple(dict.fromkeys(chain(self._ids, other._ids))))
 
     @assert_same_model('union')
     def __ior__(self, other):
-        self._ids += other.ids
-        return self
+        return self | other         # Recordsets are never modified in place, they may be shared
+
+    @assert_same_model('intersection')
+    def __and__(self, other):
+        other_ids = other._ids_set
+        return self._new(tuple(res_id for res_id in self._ids if res_id in other_ids))
+
+    @assert_same_model('difference')
+    def __sub__(self, other):
+        other_ids = other._ids_set
+        return self._new(tuple(res_id for res_id in self._ids if res_id not in other_ids))
 
     def ensure_one(self):
         if len(self) != 1:
@@ -77,7 +117,7 @@ class RecordSet:
 
     @property
     def ids(self):
-        return self._ids
+        return list(self._ids)
 
     @property
     def context(self):
@@ -87,6 +127,10 @@ class RecordSet:
     def id(self):
         return False if not self._ids else self._ids[0]
 
+    @property
+    def logger(self):
+        return self._env.logger
+
     @property
     def _model(self):
         return self._env[self._name]
@@ -96,16 +140,36 @@ class RecordSet:
     def model_cache(self):
         return self._env.cache[self._name]
 
-
-    def _recordset(self, ids: Union[list[int], int]):
-        ids = [ids] if isinstance(ids, int) else ids
-        return self.__class__(self._name, self._env, ids, context=self._context)
+    @property
+    def _ids_set(self) -> frozenset:
+        if self._id_set is None:
+            self._id_set = frozenset(self._ids)
+        return self._id_set
+
+
+    def _recordset(self, ids: Union[list[int], int], prefetch_ids: list[int] = None):
+        return self.__class__(self._name, self._env, ids, context=self._context, prefetch_ids=prefetch_ids)
+
+    def _new(self, ids: tuple[int], prefetch_ids: list[int] = None):
+        """ Same as _recordset() for a tuple of unique ids (slices, set operations...), used as is: no check, no copy """
+        records = object.__new__(self.__class__)
+        set_attr = object.__setattr__      # Skip __setattr__(), this is called for each record when iterating
+        set_attr(records, '_name', self._name)
+        set_attr(records, '_env', self._env)
+        set_attr(records, '_ids', ids)
+        set_attr(records, '_id_set', None)
+        set_attr(records, '_prefetch_ids', prefetch_ids if prefetch_ids is not None else ids)
+        set_attr(records, '_context', self._context)
+        return records
 
     @staticmethod
-    def _sanitize_ids(ids: Union[list[int], int]):
-        ids = ids if isinstance(ids, list) else [ids]
-        seen = set()
-        return [i for i in ids if not (i in seen or seen.add(i))]
+    def _sanitize_ids(ids: Union[list[int], int]) -> tuple[int]:
+        """ Ids as a tuple, without duplicates (order is kept) """
+        if not ids:
+            return ()
+        if isinstance(ids, int):
+            return (ids,)
+        return tuple(dict.fromkeys(ids))
 
     @staticmethod
     def _format_domain(domain: list[tuple]) -> list[list]:
@@ -114,6 +178,8 @@ class RecordSet:
     @log_request
     def _execute(self, method, *args, **kw):
         """ Add ids in args if method is not @model decorated"""
+        if self._env.batching and method != 'fields_get':
+            self._env.flush()       # Queued operations must be visible to any other call (metadata don't depend on them)
         if not (m := getattr(self, method, None)) or (getattr(m, '_api', None) != 'model'):
             args = [self._ids] + list(args)
         kw['context'] = self.context | kw.get('context', dict())
@@ -137,6 +203,123 @@ class RecordSet:
             self.logger.error("Odoo API Response:\n" + str(e).replace('\\n', '\n'))
             raise e
 
+    def _execute_chunked(self, method, *args, **kw):
+        """
+        Same as _execute() but ids are sent by chunks of `env.chunk_size`, concurrently if `env.max_workers` > 1
+        Yield (records, result) for each chunk, in order and in the calling thread, so the cache can be fed incrementally
+        """
+        chunks = [self._new(tuple(ids)) for ids in split_every(self._env.chunk_size, self._ids) if ids] or [self]
+        if len(chunks) == 1 or self._env.max_workers <= 1:
+            for records in chunks:
+                yield records, records._execute(method, *args, **kw)
+            return
+
+        if self._env.batching and method != 'fields_get':
+            self._env.flush()       # The batch is per thread, the pool threads wouldn't see it
+        executor = ThreadPoolExecutor(max_workers=min(self._env.max_workers, len(chunks)))
+        try:
+            futures = [executor.submit(records._execute, method, *args, **kw) for records in chunks]
+            for records, future in zip(chunks, futures):
+                yield records, future.result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _read_from_cache(self, fields: list[str], **kw) -> list[dict]:
+        self._check_cache_changes()
+        res, groups = self.model_cache.read_plan(self._ids, fields)
+        for ids, missing_fields in groups:
+            fetched = {rec_dict['id']: rec_dict for rec_dict in self._recordset(ids).read(missing_fields, **kw)}
+            for res_id in ids:
+                if res_id in fetched:
+                    res[res_id].update(fetched[res_id])
+                else:
+                    del res[res_id]         # Deleted in the meantime, read() wouldn't return it either
+        return [res[res_id] for res_id in self._ids if res_id in res]
+
+    def _write_value(self, field: str, value):
+        """ Value of `field` as write() expects it, when it's given as a recordset """
+        if isinstance(value, RecordSet):
+            if self.get_field_info(field, 'type') == 'many2one':
+                return value.id
+            return [(6, 0, list(value._ids))]
+        return value
+
+    def _upsert_prepare(self, vals_list: list[dict], key_fields: list[str]) -> dict:
+        """ {key: vals} for upsert(), the vals of a key given several times are merged (the last ones win) """
+        pending = dict()
+        for vals in vals_list:
+            missing = [field for field in key_fields if field not in vals]
+            if missing:
+                raise ValueError(f"Key fields {missing} are missing from {vals}, upsert() can't tell if it exists")
+            pending.setdefault(self._upsert_key(vals, key_fields), dict()).update(vals)
+        return pending
+
+    def _upsert_search(self, pending: dict, key_fields: list[str]) -> tuple[list[str], list[list]]:
+        """
+        Fields to read and domains of the search_read finding the existing records of upsert(), one per chunk of keys
+        Each domain matches a superset of its keys (one `in` per key field), exact matches are made locally
+        Relations given by commands and binaries are not read, they are always written
+        """
+        fields = list({
+            field: None for vals in pending.values() for field in vals
+            if self.get_field_info(field, 'type') not in [None, 'one2many', 'many2many', 'binary']
+        } | dict.fromkeys(key_fields))
+        domains = [
+            [(field, 'in', list({key[i] for key in keys})) for i, field in enumerate(key_fields)]
+            for keys in split_every(self._env.chunk_size, pending)
+        ]
+        return fields, domains
+
+    def _upsert_split(self, pending: dict, key_fields: list[str], rows: list[dict]) -> tuple[dict, list, list]:
+        """
+        Split upsert() in ({key: id of the existing record}, [(key, vals) to create], [(changes, ids) to write])
+        Only the fields whose value differs from `rows` are written, records having the same changes together
+        """
+        ids, writes = dict(), dict()
+        for row in rows:
+            key = self._upsert_key(row, key_fields)
+            if key not in pending or key in ids:
+                continue            # Not asked, or the same key on several records: the oldest one is updated
+            ids[key] = row['id']
+            changes = {field: value for field, value in pending[key].items() if field not in row or self._upsert_value(field, value) != self._upsert_value(field, row[field])}
+            if changes:
+                writes.setdefault(freeze(changes), (changes, list()))[1].append(row['id'])
+
+        creates = [(key, vals) for key, vals in pending.items() if key not in ids]
+        return ids, creates, list(writes.values())
+
+    def _upsert_key(self, vals: dict, key_fields: list[str]) -> tuple:
+        return tuple(freeze(self._upsert_value(field, vals[field])) for field in key_fields)
+
+    def _upsert_value(self, field: str, value):
+        """ Comparable value: read() gives (id, name) for a many2one while vals only have the id """
+        if self.get_field_info(field, 'type') == 'many2one':
+            return (relational_ids(value, 'many2one') or [False])[0]
+        return value
+
+    def _query(self, method: str, domain: list[tuple], **kw):
+        """ _execute() of a search method, its result is kept `query_cache_ttl` seconds if set (see env.query_cache) """
+        domain = self._format_domain(domain)
+        if not self._env.query_cache_ttl:
+            return self._execute(method, domain, **kw)
+
+        if self._env.batching:
+            self._env.flush()       # Queued creates and unlinks change the results
+        key = self._env.query_cache.key(method, domain, kw, self._context)
+        res = self._env.query_cache.get(self._name, key)
+        if res is _MISSING:
+            res = self._execute(method, domain, **kw)
+            self._env.query_cache.set(self._name, key, res, self._env.query_cache_ttl)
+        return res
+
+    def _update_cache(self, op, res, *args, **kwargs):
+        """ Called by create(), write(), unlink() and read() with their result, for each chunk of a chunked operation """
+        if op != 'read':
+            self._env.query_cache.invalidate()
+        if self.env.cache_enabled:
+            self.env.logger.log("FTRACE", f"[CACHE] {op} on {self} {args} {kwargs}")
+            return self.env.cache[self._name].update(op, self, res, *args, **kwargs)
+
     # --------------------------------------------
     #                   ORM
     # --------------------------------------------
@@ -156,8 +339,9 @@ class RecordSet:
         return self._execute('check_object_reference', module, xml_id)
 
     def with_context(self, **kw):
-        self._context = self._context.copy(**kw)
-        return self
+        """ Return a copy of the recordset with an updated context, like Odoo does """
+        context = self._context if kw.items() <= self._context.items() else self._context.copy(**kw)
+        return self.__class__(self._name, self._env, self._ids, context=context, prefetch_ids=self._prefetch_ids)
 
 
     # --- CRUD ---
@@ -165,41 +349,158 @@ class RecordSet:
 
     @model
     def search(self, domain: list[tuple], **kw):
-        ids = self._execute('search', self._format_domain(domain), **kw)
+        ids = self._query('search', domain, **kw)
         return self._recordset(ids)
 
-    @cache('read')
-    def read(self, fields: list[str] = None, **kw) -> list[dict]:
+    def read(self, fields: list[str] = None, use_cache: bool = False, **kw) -> list[dict]:
+        """
+        With `use_cache`, fresh values of the cache are not asked again: only the missing or expired (ids x fields) are
+        fetched, then the result is assembled as if everything was read (see env.cache.stats for served/fetched values)
+        """
         fields = fields or list()
-        res = self._execute('read', fields=fields, **kw)
+        if use_cache and fields and self.env.cache_enabled:
+            return self._read_from_cache(fields, **kw)
+
+        res = list()
+        for records, chunk_res in self._execute_chunked('read', fields=fields, **kw):
+            records._update_cache('read', chunk_res, fields=fields, **kw)
+            res += chunk_res
         return res
 
     @model
     def search_read(self, domain: list[tuple], fields: list[str] = None, **kw):
         fields = fields or list()
         res = self._execute('search_read', self._format_domain(domain), fields=fields, **kw)
-        return self._recordset([r.get('id') for r in res])
+        records = self._recordset([r.get('id') for r in res])
+        records._update_cache('read', res, fields=fields)
+        return records
+
+    @model
+    def iter_search_read(self, domain: list[tuple], fields: list[str] = None, batch_size: int = None, as_records: bool = False, update_cache: bool = True, **kw):
+        """
+        Generator version of search_read(), paginated on ids (`id > last_id`) so memory stays flat whatever the size
+        Yield dicts as they arrive, or single records if `as_records` is set (their values are then served by the cache)
+        Records come by increasing id, `order`, `limit` and `offset` can't be given
+        """
+        paging = [key for key in ['order', 'limit', 'offset'] if key in kw]
+        if paging:
+            raise TypeError(f"iter_search_read() pages by id with `batch_size` itself, {paging} can't be given")
+        fields = fields or list()
+        batch_size = batch_size or self._env.chunk_size or 1000
+        domain = self._format_domain(domain)
+        last_id = 0
+
+        while True:
+            res = self._execute('search_read', [['id', '>', last_id]] + domain, fields=fields, order='id', limit=batch_size, **kw)
+            batch_ids = [r['id'] for r in res]
+            if update_cache or as_records:
+                self._recordset(batch_ids)._update_cache('read', res, fields=fields)
+
+            for rec_dict in res:
+                yield self._recordset(rec_dict['id'], prefetch_ids=batch_ids) if as_records else rec_dict
+
+            if len(res) < batch_size:
+                return
+            last_id = batch_ids[-1]
 
     @model
     def search_count(self, domain: list[tuple]):
-        return self._execute('search_count', self._format_domain(domain))
+        return self._query('search_count', domain)
+
+    @model
+    def read_group(self, domain: list[tuple], fields: list[str], groupby: Union[str, list[str]], **kw) -> list[dict]:
+        return self._execute('read_group', self._format_domain(domain), fields, groupby, **kw)
 
     @model
-    @cache('create')
     def create(self, vals_list: Union[dict, list[dict]]):
         vals_list = vals_list if isinstance(vals_list, list) else [vals_list]
-        ids = self._execute('create', vals_list)
-        return self._recordset(ids)
+        if self._env.batching:
+            return self._env.current_batch.create(self, vals_list)
+        records = self._recordset(self._execute('create', vals_list))
+        records._update_cache('create', records, vals_list)
+        return records
 
-    @cache('write')
     def write(self, vals: dict):
-        return self._execute('write', vals)
+        if self._env.batching:
+            return self._env.current_batch.write(self, vals)
+        res = True
+        for records, chunk_res in self._execute_chunked('write', vals):
+            records._update_cache('write', chunk_res, vals)
+            res = res and chunk_res
+        return res
 
-    @cache('delete')
     def unlink(self):
-        res = self._execute('unlink')
+        if self._env.batching:
+            return self._env.current_batch.unlink(self)
+        res = True
+        for records, chunk_res in self._execute_chunked('unlink'):
+            records._update_cache('delete', chunk_res)
+            res = res and chunk_res
         return res
 
+    @model
+    def upsert(self, vals_list: Union[dict, list[dict]], key_fields: Union[str, list[str]]):
+        """
+        Create or update records identified by the values of `key_fields`, in a few calls whatever the number of records:
+            - existing records (archived ones included) are found by a search_read per chunk of `env.chunk_size` keys
+            - only the fields whose value changed are written, records with identical changes in the same call
+            - the others are created by chunks of `env.chunk_size`
+        The cache is filled with the given values, nothing is read again. Return the records in the order of `vals_list`
+        >>> env['res.partner'].upsert([{'ref': 'C001', 'name': 'Azure'}, {'ref': 'C002', 'name': 'Deco'}], 'ref')
+        >>> res.partner(14, 57)
+        """
+        vals_list = vals_list if isinstance(vals_list, list) else [vals_list]
+        key_fields = [key_fields] if isinstance(key_fields, str) else list(key_fields)
+        pending = self._upsert_prepare(vals_list, key_fields)
+
+        fields, domains = self._upsert_search(pending, key_fields)
+        rows = list()
+        for domain in domains:
+            rows += self._execute('search_read', domain, fields=fields, order='id', context={'active_test': False})
+        self._update_cache('read', rows, fields=fields)
+        ids, creates, writes = self._upsert_split(pending, key_fields, rows)
+
+        for chunk in split_every(self._env.chunk_size, creates):
+            vals_chunk = [vals for key, vals in chunk]
+            records = self._recordset(self._execute('create', vals_chunk))
+            records._update_cache('create', records, vals_chunk, reread=False)
+            ids.update(zip([key for key, vals in chunk], records._ids))
+
+        for changes, res_ids in writes:
+            for records, res in self._recordset(res_ids)._execute_chunked('write', changes):
+                records._update_cache('write', res, changes, reread=False)
+
+        return self._recordset([ids[self._upsert_key(vals, key_fields)] for vals in vals_list])
+
+    def to_columns(self, fields: list[str]) -> Columns:
+        """
+        Read `fields` by chunks straight into columns (see Columns), for analytics on many records: no dict is kept
+        per record, then to_numpy(), to_arrow() or to_parquet(). The cache is not filled
+        """
+        columns = Columns(fields, self.model_cache.fields)
+        for records, rows in self._execute_chunked('read', fields=fields):
+            columns.extend(rows)
+        return columns
+
+    @model
+    def read_columns(self, domain: list[tuple], fields: list[str], batch_size: int = None, **kw) -> Columns:
+        """ Same as to_columns() on the records matching `domain`, fetched page by page like iter_search_read() """
+        columns = Columns(fields, self.model_cache.fields)
+        batch_size = batch_size or self._env.chunk_size or 1000
+        for rows in split_every(batch_size, self.iter_search_read(domain, fields, batch_size=batch_size, update_cache=False, **kw)):
+            columns.extend(rows)
+        return columns
+
+    def parallel_call(self, method: str, *args, chunk_size: int = None, workers: int = None, rate: float = None, retries: int = 2, retry_unsafe: bool = False, **kw):
+        """
+        Call `method` on chunks of the records concurrently, see env.map() for the options and ParallelResult for the result
+        >>> invoices.parallel_call('action_post', chunk_size=50, workers=4).raise_if_failed()
+        """
+        return self._env.map(
+            lambda records: records._execute(method, *args, **kw), self,
+            chunk_size=chunk_size, workers=workers, rate=rate, retries=retries, retry_unsafe=retry_unsafe,
+        )
+
     def copy(self):
         res_id = self._execute('copy')
         return self._recordset(res_id)
@@ -209,31 +510,143 @@ class RecordSet:
 
 
     def mapped(self, field: str):
-        """ Perform a read only if any of the record has dirty cache """
+        """
+        Perform a read of the records having a dirty cache only
+        `field` can be a dotted path (ex: 'partner_id.country_id.code'), prefetched level by level, see prefetch()
+        """
+        if '.' in field:
+            return self._mapped_path(field)
+
+        self._check_cache_changes()
+        read_res = list()
         if not self.env.cache_enabled or self.cache_expired(field):
-            read_res = self.read([field])
+            read_res = self.read([field], use_cache=True)
             if not self.env.cache_enabled:
                 self.env.logger.warning(f"With cache disabled, the result of mapped() is quite different from Odoo's behavior in case of relational fields. It only returns a list with raw results from API for now.")
                 return [rec.get(field) for rec in read_res]
 
-        res = [getattr(rec, field) for rec in self]
-        # Return a recordset if the field is relational
-        if is_relational_field(self.get_field_info(field, 'type')):
-            res = reduce(lambda a, b: a | b, res)
-            res = res.with_context(**self.context)
+        # Relations are collected from the stored ids: one pass and a single recordset, whatever the number of records
+        # Values evicted by the read() itself come from its result, the ones expired since then are read again at once
+        values = self.model_cache.raw_values(self._ids, field, read_res)
+        missing = [res_id for res_id, value in zip(self._ids, values) if value is _MISSING]
+        if missing:
+            values = self.model_cache.raw_values(self._ids, field, read_res + self._recordset(missing).read([field]))
+        values = [value for value in values if value is not _MISSING]       # Deleted in the meantime
+        field_type = self.get_field_info(field, 'type')
+        if field_type == 'many2one':
+            ids = dict.fromkeys(value for value in values if value)
+        elif field_type in ['one2many', 'many2many']:
+            ids = dict.fromkeys(res_id for value in values for res_id in value)
+        else:
+            return values
+        return self._env[self.get_field_info(field, 'relation')].with_context(**self.context)._new(tuple(ids))
 
+
+    @model
+    def aggregate(
+            self,
+            domain: list[tuple],
+            groupby: Union[str, list[str]],
+            measures: list[str],
+            lazy: bool = False,
+            orderby: str = None,
+            page_size: int = None,
+            cache_ttl: float = None,
+    ) -> list[dict]:
+        """
+        Aggregate `measures` of the records matching `domain` per `groupby` on the server (read_group): only the groups
+        are transferred, by pages of `page_size` groups (default: env.chunk_size)
+            - measures: 'field' (its default aggregate), 'field:sum', 'alias:max(field)'...
+            - groupby: 'field' or 'date_field:month', many2one groups are recordsets and date ranges are dates
+        Each group is a dict of its groupby values, its measures, its number of records (__count) and its __domain
+        With `cache_ttl`, the result is kept that many seconds, see env.query_cache
+        >>> env['sale.order'].aggregate([('state', '=', 'sale')], 'partner_id', ['amount_total:sum'])
+        >>> [{'partner_id': res.partner(14), 'amount_total': 1520.5, '__count': 3, '__domain': [...]}, ...]
+        """
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby or [])
+        domain = self._format_domain(domain)
+        key = self._env.query_cache.key('read_group', domain, groupby, measures, lazy, orderby, self._context)
+        if cache_ttl and (res := self._env.query_cache.get(self._name, key)) is not _MISSING:
+            return [dict(group) for group in res]
+
+        res, page_size, offset = list(), page_size or self._env.chunk_size or 1000, 0
+        while True:
+            kw = {'orderby': orderby} if orderby else dict()
+            groups = self.read_group(domain, measures, groupby, offset=offset, limit=page_size, lazy=lazy, **kw)
+            res += [self._aggregate_group(group, groupby, measures) for group in groups]
+            if len(groups) < page_size:
+                break
+            offset += page_size
+
+        if cache_ttl:
+            self._env.query_cache.set(self._name, key, [dict(group) for group in res], cache_ttl)
         return res
 
+    def sum(self, field: str, domain: list[tuple] = None) -> float:
+        """
+        Sum of `field` computed by the server, over these records, the records matching `domain`, or both
+        >>> invoices.sum('amount_residual')
+        >>> env['account.move'].sum('amount_residual', [('state', '=', 'posted')])
+        """
+        total = 0
+        for records, domain in self._aggregate_domains(domain):
+            total += sum(group.get(field) or 0 for group in records.read_group(domain, [f"{field}:sum"], [], lazy=False))
+        return total
+
+    def count(self, domain: list[tuple] = None) -> int:
+        """ Number of records counted by the server, with the same rules as sum() """
+        return sum(records.search_count(domain) for records, domain in self._aggregate_domains(domain))
 
-    def filtered(self, func: Union[callable, str]):
+    def prefetch(self, paths: Union[str, list[str]]) -> "RecordSet":
+        """
+        Fill the cache along dotted `paths`, walking relations level by level: each level costs one read per model
+        (only values missing from the cache are fetched), so a deep traversal costs O(depth) calls instead of O(records)
+        >>> orders.prefetch(['partner_id.country_id', 'order_line.product_id'])
+        """
+        level = {self._name: (dict.fromkeys(self._ids), path_tree([paths] if isinstance(paths, str) else paths))}
+        while level:
+            next_level = dict()
+            for model_name, (ids, tree) in level.items():
+                rows = self._env[model_name].with_context(**self.context).browse(list(ids)).read(list(tree), use_cache=True) if ids else []
+                self._prefetch_next_level(next_level, model_name, rows, tree)
+            level = next_level
+        return self
+
+    def filtered(self, func: Union[callable, str, list]):
+        """
+        Keep the records satisfying `func`, never with one call per record:
+            - a domain, or a stored field name (can be dotted) the server can test for emptiness: done by a search
+            - any other field name: values are prefetched in one go, then tested locally
+            - a callable: tested locally, values are prefetched for all the records on first access
+        """
+        if isinstance(func, list):
+            return self.filtered_domain(func)
         if isinstance(func, str):
             name = func
-            func = lambda rec: rec[name]
-            # func = lambda rec: any(rec.mapped(name))      # Odoo behavior
-        return self.browse([rec.id for rec in self if func(rec)])
+            if self._stored_field_type(name) in SERVER_TESTABLE_TYPES:
+                return self.filtered_domain([(name, '!=', False)])
+            self.prefetch(name)
+            func = (lambda rec: any(rec.mapped(name))) if '.' in name else (lambda rec: rec[name])
+        return self._new(tuple(rec.id for rec in self if func(rec)))
 
     def filtered_domain(self, domain: list[tuple]):
-        return self.search([('id', 'in', self.ids)] + domain)
+        """ Records matching `domain`, in the same order. Archived records are kept like Odoo does (active_test=False) """
+        found = set()
+        for ids in split_every(self._env.chunk_size, self._ids):
+            found.update(self.search([('id', 'in', ids)] + domain, context={'active_test': False}).ids)
+        return self._new(tuple(res_id for res_id in self._ids if res_id in found))
+
+    def sorted(self, key: Union[callable, str] = None, reverse: bool = False):
+        """
+        Return the records sorted by `key`:
+            - None or an order spec like Odoo's _order ('date desc, id'): sorted by the server with a single search
+            - a callable: sorted locally, values are prefetched for all the records on first access
+        """
+        if callable(key):
+            return self._recordset([rec.id for rec in sorted(self, key=key, reverse=reverse)])
+
+        ids = self.search([('id', 'in', self._ids)], order=key, context={'active_test': False}).ids if self._ids else []
+        return self._recordset(ids[::-1] if reverse else ids)
 
 
 
@@ -242,12 +655,88 @@ class RecordSet:
     # --------------------------------------------
 
 
+    def _mapped_path(self, path: str):
+        if not self.env.cache_enabled:
+            raise EnvironmentError("You must activate cache to use dotted paths in mapped()")
+        self.prefetch(path)
+        *relations, field = path.split('.')
+        records = self
+        for relation in relations:
+            records = records.mapped(relation)
+        return records.mapped(field)
+
+    def _aggregate_group(self, group: dict, groupby: list[str], measures: list[str]) -> dict:
+        """ Typed version of a group of read_group(): recordsets for many2one, dates for date ranges """
+        res = dict()
+        for spec in groupby:
+            if spec not in group:
+                continue        # Lazy groupby, only the first field is grouped
+            field, value = spec.split(':')[0], group[spec]
+            field_type = self.get_field_info(field, 'type')
+            if field_type == 'many2one':
+                value = self._env[self.get_field_info(field, 'relation')].with_context(**self.context).browse(value[0] if value else [])
+            elif field_type in ['date', 'datetime'] and spec in group.get('__range', dict()):
+                bounds = group['__range'][spec]
+                value = date.fromisoformat(bounds['from'][:10]) if bounds else False
+            res[spec] = value
+        for measure in measures:
+            name = measure.split(':')[0]
+            res.setdefault(name, group.get(name))
+        res['__count'] = group.get('__count', group.get(f"{groupby[0].split(':')[0]}_count") if groupby else None)
+        res['__domain'] = group.get('__domain')
+        return res
+
+    def _aggregate_domains(self, domain: list[tuple] = None) -> list[tuple["RecordSet", list]]:
+        """ (records, domain) to aggregate for sum() and count(): by chunks of ids if there are ids, archived ones included """
+        if not self._ids:
+            return [] if domain is None else [(self, self._format_domain(domain))]
+        records = self.with_context(active_test=False)
+        return [(records, [['id', 'in', ids]] + self._format_domain(domain or [])) for ids in split_every(self._env.chunk_size, self._ids)]
+
+    def _stored_field_type(self, path: str) -> str:
+        """ Type of the last field of a dotted path, None if the path is not valid or not stored all along (not searchable) """
+        model_cache = self.model_cache
+        *relations, field = path.split('.')
+        for relation in relations:
+            infos = model_cache.fields.get(relation, dict())
+            if not is_relational_field(infos.get('type')) or not infos.get('store'):
+                return None
+            model_cache = self._env.cache[infos['relation']]
+        infos = model_cache.fields.get(field, dict())
+        return infos.get('type') if infos.get('store') else None
+
+    def _prefetch_next_level(self, next_level: dict, model_name: str, rows: list[dict], tree: dict):
+        """ Add the comodels records referenced by `rows` to `next_level`, along with the paths to read on them """
+        model_cache = self._env.cache[model_name]
+        for field, subtree in tree.items():
+            if not subtree:
+                continue
+            field_type = model_cache.fields.get(field, dict()).get('type')
+            if not is_relational_field(field_type):
+                raise ValueError(f"Field {field} of {model_name} is not relational, it can't be followed by {tree_paths(subtree)}")
+            ids, comodel_tree = next_level.setdefault(model_cache.fields[field]['relation'], (dict(), dict()))
+            ids.update(dict.fromkeys(res_id for row in rows for res_id in relational_ids(row.get(field), field_type)))
+            path_tree(tree_paths(subtree), comodel_tree)
+
+    def _check_cache_changes(self):
+        """ Invalidate the records changed on the server before using the cache, see Cache.poll_changes() """
+        if self._env.cache.poll_due:
+            self._env.cache.poll_changes()
+
     def cache_expired(self, field: str):
-        return self.model_cache.cache_expired(field, self.ids)
+        return self.model_cache.cache_expired(field, self._ids)
 
     def get_field_info(self, field: str, info: str):
-        if self.model_cache.field_exists(field):
-            return self.model_cache.fields[field][info]
-        return None
+        """
+        Attribute `info` of `field` as fields_get() gives it, None if the field or the attribute doesn't exist
+        The cache keeps FIELDS_ATTRIBUTES only, others (string, help, selection...) are asked once for all the fields
+        """
+        if not self.model_cache.field_exists(field):
+            return None
+        infos = self.model_cache.fields[field]
+        if info not in infos and info not in FIELDS_ATTRIBUTES:
+            for name, attributes in self._env[self._name].fields_get(attributes=[info]).items():
+                self.model_cache.fields.get(name, dict()).setdefault(info, attributes.get(info))
+        return infos.get(info)
 
 
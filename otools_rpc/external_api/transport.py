@@ -0,0 +1,174 @@
+import http.client
+import json
+import queue
+import time
+import xmlrpc.client
+from itertools import count
+from urllib.parse import urlsplit
+from .instrumentation import add_transfer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_dumps(obj) -> bytes:
+    return orjson.dumps(obj) if orjson else json.dumps(obj).encode()
+
+
+def json_loads(data: bytes):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of keep-alive HTTP(S) connections to the host of `url`
+    Up to `size` idle connections are kept open, so a call costs a single round trip instead of a new TCP/TLS handshake.
+    Calls failing on a connection error are retried `retries` times with an exponential backoff, the first retry is
+    immediate as it's most likely a connection closed by the server. Only when the server can't have run the call:
+    the request could not be sent (refused, reset...), or a reused keep-alive connection was closed before any response.
+    A new connection dropped after sending the request is not retried, a create() could be done twice.
+    """
+
+    def __init__(self, url: str, size: int = 10, timeout: float = None, retries: int = 3, backoff_factor: float = 0.3):
+        parts = urlsplit(url)
+        self._host = parts.netloc
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+    def __str__(self):
+        return f"ConnectionPool({self._host})"
+
+    def post(self, path: str, body: bytes, headers: dict) -> tuple[http.client.HTTPResponse, bytes]:
+        """ Send a POST request on a pooled connection and return the response along with its (fully read) body """
+        for attempt in count():
+            connection, reused = self._acquire()
+            sent = responded = False
+            try:
+                connection.request('POST', path, body, headers)
+                sent = True
+                response = connection.getresponse()
+                responded = True
+                data = response.read()
+            except ConnectionError:
+                connection.close()
+                if attempt >= self.retries or responded or (sent and not reused):
+                    raise
+                time.sleep(self.backoff_factor * (2 ** attempt - 1))
+                continue
+            except Exception:
+                connection.close()
+                raise
+
+            self._release(connection, response)
+            add_transfer(len(body), len(data))
+            return response, data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        """ An idle connection (True: reused) or a new one (False) """
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connection_class(self._host, timeout=self.timeout), False
+
+    def _release(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse):
+        if response.will_close:
+            connection.close()
+            return
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+
+class PooledTransport(xmlrpc.client.Transport):
+    """ XML-RPC transport sending requests through a ConnectionPool, so it can be shared between threads """
+
+    def __init__(self, pool: ConnectionPool):
+        super().__init__()
+        self._pool = pool
+
+    def request(self, host, handler, request_body, verbose=False):
+        response, data = self._pool.post(handler, request_body, {'Content-Type': 'text/xml', 'User-Agent': self.user_agent})
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(host + handler, response.status, response.reason, response.msg)
+
+        parser, unmarshaller = self.getparser()
+        parser.feed(data)
+        parser.close()
+        return unmarshaller.close()
+
+
+class JsonRpcProxy:
+    """
+    Drop-in replacement of a ServerProxy, talking to the /jsonrpc endpoint of Odoo with the same methods and arguments:
+    >>> JsonRpcProxy(pool, 'object', '/jsonrpc').execute_kw(db, uid, password, model, method, args, kw)
+    JSON is much cheaper to encode/decode than XML (even more with orjson installed), and server errors are raised as
+    xmlrpc.client.Fault so callers don't have to care about the protocol.
+    """
+
+    def __init__(self, pool: ConnectionPool, service: str, path: str = '/jsonrpc'):
+        self._pool = pool
+        self._service = service
+        self._path = path
+        self._ids = count(1)
+
+    def __str__(self):
+        return f"JsonRpcProxy({self._pool}{self._path} - {self._service})"
+
+    def __getattr__(self, method):
+        if method.startswith('__'):
+            raise AttributeError(method)
+
+        def call(*args):
+            return self._call(method, args)
+        return call
+
+    def _call(self, method: str, args: tuple):
+        body = json_dumps({
+            'jsonrpc': '2.0',
+            'method': 'call',
+            'params': {'service': self._service, 'method': method, 'args': args},
+            'id': next(self._ids),
+        })
+        response, data = self._pool.post(self._path, body, {'Content-Type': 'application/json'})
+        if response.status != 200:
+            raise xmlrpc.client.ProtocolError(self._path, response.status, response.reason, response.msg)
+
+        res = json_loads(data)
+        if error := res.get('error'):
+            details = error.get('data') or dict()
+            raise xmlrpc.client.Fault(error.get('code'), details.get('debug') or details.get('message') or error.get('message'))
+        return res.get('result')
+
+
+def server_proxy(url: str, pool: ConnectionPool) -> xmlrpc.client.ServerProxy:
+    """ Same as xmlrpc.client.ServerProxy(url, allow_none=True), but requests go through the connections of `pool` """
+    return xmlrpc.client.ServerProxy(url, transport=PooledTransport(pool), allow_none=True)
+
+
+def xmlrpc_proxy(url: str, service: str, pool: ConnectionPool) -> xmlrpc.client.ServerProxy:
+    return server_proxy(f"{url}/xmlrpc/2/{service}", pool)
+
+
+def jsonrpc_proxy(url: str, service: str, pool: ConnectionPool) -> JsonRpcProxy:
+    return JsonRpcProxy(pool, service, path=f"{urlsplit(url).path}/jsonrpc")
+
+
+# Protocols available for Environment(protocol=...): a factory (url, service, pool) -> proxy
+# Any other factory with the same signature can be given instead of a name
+PROTOCOLS = {
+    'xmlrpc': xmlrpc_proxy,
+    'jsonrpc': jsonrpc_proxy,
+}
@@ -1,4 +1,5 @@
-from typing import Any
+from itertools import islice
+from typing import Any, Iterable, Iterator
 
 
 def is_magic_number(val: Any) -> bool:
@@ -19,4 +20,44 @@ def is_magic_number_list(vals_list: Any) -> bool:
 
 
 def is_relational_field(field_type: str) -> bool:
-    return field_type in ['many2one', 'one2many', 'many2many']
\ No newline at end of file
+    return field_type in ['many2one', 'one2many', 'many2many']
+
+def split_every(size: int, iterable: Iterable) -> Iterator[list]:
+    """ Split an iterable in lists of `size` elements (the last one may be shorter). A falsy size means no split """
+    iterator = iter(iterable)
+    if not size:
+        yield list(iterator)
+        return
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def freeze(value: Any) -> Any:
+    """ Hashable version of a value made of dicts, lists and tuples, so it can be used as a dict key """
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def path_tree(paths: Iterable[str], tree: dict = None) -> dict:
+    """ Merge dotted paths in a tree of dicts: ['a.b', 'a.c', 'd'] -> {'a': {'b': {}, 'c': {}}, 'd': {}} """
+    tree = tree if tree is not None else dict()
+    for path in paths:
+        node = tree
+        for name in path.split('.'):
+            node = node.setdefault(name, dict())
+    return tree
+
+def tree_paths(tree: dict) -> list[str]:
+    """ Reverse of path_tree() """
+    return [f"{name}.{path}" if path else name for name, subtree in tree.items() for path in (tree_paths(subtree) or [''])]
+
+def relational_ids(value: Any, field_type: str) -> list[int]:
+    """ Ids of a relational value as returned by read(): False, (id, name) for a many2one or a list of ids """
+    if not value:
+        return []
+    if field_type == 'many2one':
+        return [value[0] if isinstance(value, (list, tuple)) else value]
+    return list(value)
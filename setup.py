@@ -28,6 +28,8 @@ setup(
     ],
     extras_require={
         "dev": ["pytest>=7.0", "twine>=4.0.2"],
+        "async": ["httpx>=0.23"],
+        "jsonrpc": ["orjson>=3.0"],
     },
     python_requires=">=3.8",
 )